@@ -2,14 +2,24 @@
 
 import sys
 import os
+import traceback
 from PySide2 import QtCore, QtUiTools, QtWidgets, QtGui
 import cv2
 import numpy as np
 import math
-from PIL import ImageFont, ImageDraw, Image
+import engine
+import preview
+import image_store
+import project
+import profiles
+import instrument
 
 PWD = os.path.dirname(os.path.abspath(__file__))
 
+# 드래그/휠 중 다시 그리는 최소 간격 (약 60fps)과, 입력이 멈춘 뒤 고화질로 다시 그리기까지의 대기 시간
+RENDER_INTERVAL_MS = 16
+SETTLE_INTERVAL_MS = 150
+
 def clickable(widget):
     class Filter(QtCore.QObject):
         clicked = QtCore.Signal()
@@ -60,6 +70,100 @@ def wheelable(widget):
     widget.installEventFilter(filter)
     return filter.scrolled
 
+class ExportSignals(QtCore.QObject):
+    progress = QtCore.Signal(str, int)
+    finished = QtCore.Signal(str)
+    failed = QtCore.Signal(str)
+    cancelled = QtCore.Signal()
+
+class ExportWorker(QtCore.QRunnable):
+    '''
+    레이아웃을 렌더링하고 저장하는 백그라운드 작업
+    '''
+    EXPORT_STAGES = {
+        "slots": "사진 배치",
+        "frame": "프레임 합성",
+        "text": "문구 그리기",
+        "encode": "파일 저장"
+    }
+
+    def __init__(self, layout, images, save_path):
+        super().__init__()
+        self.setAutoDelete(False)  # 취소를 위해 Program 이 참조를 유지한다
+        self.layout = layout
+        self.images = images
+        self.save_path = save_path
+        self.is_cancelled = False
+        self.signals = ExportSignals()
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def check_progress(self, stage, percent):
+        if self.is_cancelled:
+            raise engine.RenderCancelled()
+        self.signals.progress.emit(stage, percent)
+
+    def run(self):
+        try:
+            # XYZ_TRACE_LOG / XYZ_PROFILE_DIR 이 지정되어 있으면 단계별 기록과 프로파일을 남긴다
+            with instrument.profiled("export"), \
+                    instrument.tracer.stage("export", output=self.save_path, profile=self.layout.get("profile")):
+                self.check_progress("slots", 0)
+                result_image = engine.render_layout(self.layout, self.images, self.check_progress)
+
+                self.check_progress("encode", 85)
+                if not engine.write_image(self.save_path, result_image):
+                    raise ValueError("이미지 인코딩에 실패했습니다.")
+            self.signals.finished.emit(self.save_path)
+        except engine.RenderCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            print(e)
+            instrument.tracer.event("error", during="export", error="{}: {}".format(type(e).__name__, e),
+                                    traceback=traceback.format_exc())
+            self.signals.failed.emit(str(e))
+
+class ImageLoadSignals(QtCore.QObject):
+    loaded = QtCore.Signal(int, int, str, object, object)
+
+class ImageLoadWorker(QtCore.QRunnable):
+    '''
+    사진 한 장을 백그라운드에서 디코딩하는 작업
+    label_size 를 지정하면 미리보기용으로 축소 디코딩하고, None 이면 전체 해상도로 디코딩한다.
+    cap_factor 를 지정하면 전체 해상도 대신 원본의 cap_factor 배 크기로 줄여서 디코딩한다.
+    '''
+    def __init__(self, mode, index, file_path, label_size=None, cap_factor=None):
+        super().__init__()
+        self.mode = mode
+        self.index = index
+        self.file_path = file_path
+        self.label_size = label_size
+        self.cap_factor = cap_factor
+        self.signals = ImageLoadSignals()
+
+    def run(self):
+        kind = "full" if self.label_size is None else "preview"
+        if self.label_size is None and self.cap_factor is not None:
+            kind = "capped"
+        cv_img, orig_size = None, None
+        try:
+            with instrument.tracer.stage("decode", path=self.file_path, kind=kind) as info:
+                if kind == "capped":
+                    cv_img, orig_size = engine.read_capped_image(self.file_path, self.cap_factor)
+                elif kind == "full":
+                    cv_img = engine.read_image(self.file_path)
+                    orig_size = (cv_img.shape[1], cv_img.shape[0]) if cv_img is not None else None
+                else:
+                    cv_img, orig_size = preview.load_preview_image(self.file_path, self.label_size)
+                info["image"] = instrument.array_info(cv_img)
+        except Exception as e:
+            # cv2.error, MemoryError 등 어떤 실패든 loaded 는 반드시 보내서 로딩 상태를 풀어준다
+            print(f"Error loading image: {e}")
+            cv_img, orig_size = None, None
+        finally:
+            self.signals.loaded.emit(self.mode, self.index, self.file_path, cv_img, orig_size)
+
 class Program(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
@@ -142,18 +246,6 @@ class Program(QtWidgets.QWidget):
             [self.ui.frame_9_ver_label]
         ]
 
-        # OpenCV 이미지 저장용 리스트
-        self.images = { # OpenCV 이미지 저장
-            0: [],
-            1: [None] * 2,
-            2: [None] * 2,
-            3: [None] * 4,
-            4: [None] * 4,
-            5: [None] * 6,
-            6: [None] * 6,
-            7: [None] * 9,
-            8: [None] * 9
-        }
         self.image_paths = {
             0: [],
             1: [None] * 2,
@@ -167,6 +259,18 @@ class Program(QtWidgets.QWidget):
         }
         self.start_pos = None
         self.is_move_mode = False
+
+        # 드래그/휠 입력은 모아서 한 프레임에 한 번만 그리고, 멈추면 LANCZOS 로 다시 그린다
+        self.pending_renders = set()
+        self.draft_renders = set()
+        self.render_timer = QtCore.QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(RENDER_INTERVAL_MS)
+        self.render_timer.timeout.connect(self.flush_renders)
+        self.settle_timer = QtCore.QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(SETTLE_INTERVAL_MS)
+        self.settle_timer.timeout.connect(self.settle_renders)
         self.moved = {
             0: [],
             1: [None] * 2,
@@ -191,14 +295,49 @@ class Program(QtWidgets.QWidget):
         }
         self.clicked_label = None
 
+        # 슬롯별 미리보기 이미지 캐시와 라벨별 화면 버퍼
+        self.preview_cache = preview.PreviewCache()
+        self.label_buffers = {}
+
+        # OpenCV 이미지 저장소 {(모드, 인덱스): 이미지}, 메모리 한도를 넘으면 다른 모드의 사진부터 내린다
+        self.images = image_store.ImageStore(image_store.budget_from_env(), loader=self.reload_image,
+                                             on_evict=self.preview_cache.discard)
+        self.images.set_visible(0)
+
+        # 출력 작업은 한 번에 하나씩 백그라운드에서 실행
+        self.export_pool = QtCore.QThreadPool()
+        self.export_pool.setMaxThreadCount(1)
+        self.export_workers = []
+
+        # 디코딩 중인 슬롯 {(모드, 인덱스): 파일 경로}
+        self.loading = {}
+        self.load_workers = []
+
+        # 미리보기 이미지는 축소 디코딩하므로 원본 크기 (가로, 세로)를 따로 보관
+        self.image_sizes = {mode: [None] * len(paths) for mode, paths in self.image_paths.items()}
+        # 확대하여 전체 해상도로 다시 디코딩 중인 슬롯 {(모드, 인덱스): 파일 경로}
+        self.upgrading = {}
+        # 프로젝트에서 불러온 썸네일을 표시 중인 슬롯
+        self.thumbnails = set()
+
         # 화면 DPI 설정
         self.px_15 = 719
         self.px_10 = 483
         self.width_px = self.px_15
         self.height_px = self.px_10
 
+        # 출력 프로파일 설정
+        profiles.load_profiles(os.path.join(application_path, "profiles.json"))
+        self.output_profile = profiles.DEFAULT_PROFILE
+        for name, profile in profiles.PROFILES.items():
+            # 미리보기와 비율이 다른 프로파일은 사진이 늘어나므로 목록에서 제외
+            if profiles.aspect_matches(profile, [self.px_15, self.px_10]):
+                self.ui.profile_comboBox.addItem(profile["title"], name)
+        self.ui.profile_comboBox.setCurrentIndex(self.ui.profile_comboBox.findData(self.output_profile))
+
         # 프레임 오버레이 라벨 생성
         self.frame_overlays = [None] * 9
+        self.frame_pixmaps = {}
     
         # 오버레이 라벨 설정
         for index, widget in enumerate(self.frame_widgets):
@@ -220,6 +359,7 @@ class Program(QtWidgets.QWidget):
         이벤트 설정하는 함수
         '''
         self.ui.frame_btn.clicked.connect(self.select_frame)
+        self.ui.fill_btn.clicked.connect(self.fill_images)
         
         # 라벨 이벤트 설정
         for label_idx in self.image_labels:
@@ -238,36 +378,19 @@ class Program(QtWidgets.QWidget):
         self.ui.scale_lineEdit.returnPressed.connect(self.scale_changed)
         self.ui.text_apply_btn.pressed.connect(self.apply_btn_clicked)
         self.ui.download_btn.pressed.connect(self.export_image)
+        self.ui.cancel_btn.pressed.connect(self.cancel_export)
         self.ui.init_btn.pressed.connect(self.init)
         self.ui.init_image_btn.pressed.connect(self.image_init)
+        self.ui.open_btn.pressed.connect(self.open_project)
+        self.ui.save_btn.pressed.connect(self.save_project)
+        self.ui.profile_comboBox.currentIndexChanged.connect(self.profile_changed)
 
     def init(self):
         '''
         초기화 함수
         '''
         current_mode = self.ui.stackedWidget.currentIndex()
-        image_num = len(self.image_labels[current_mode])
-        
-        # 현재 모드의 이미지 관련 데이터만 초기화
-        self.images[current_mode] = [None] * image_num
-        self.image_paths[current_mode] = [None] * image_num
-        self.moved[current_mode] = [None] * image_num
-        self.scale[current_mode] = ["100"] * image_num
-        
-        # 현재 모드의 이미지 라벨만 초기화
-        for label in self.image_labels[current_mode]:
-            label.clear()
-            label.setText("이미지를 선택하세요")
-        
-        # 현재 모드의 프레임 이미지만 초기화
-        self.frame_image_path[current_mode] = ""
-        self.frame_overlays[current_mode].clear()
-
-        # 현재 모드의 문구 라벨만 초기화
-        for label in self.text_labels[current_mode]:
-            label.setText("")
-            font = QtGui.QFont(self.font, 12, QtGui.QFont.Normal, True)
-            label.setFont(font)
+        self.clear_mode(current_mode)
 
         # UI 초기화
         self.ui.scale_lineEdit.setText("")
@@ -279,6 +402,42 @@ class Program(QtWidgets.QWidget):
         self.ui.font_lineEdit.setEnabled(False)
         self.clicked_label = None
     
+    def clear_mode(self, mode):
+        '''
+        한 프레임 모드의 사진, 프레임, 문구 데이터와 라벨을 초기화하는 함수
+        '''
+        image_num = len(self.image_labels[mode])
+        
+        # 이미지 관련 데이터 초기화
+        self.images.discard_mode(mode)
+        self.update_memory_label()
+        self.image_paths[mode] = [None] * image_num
+        self.moved[mode] = [None] * image_num
+        self.scale[mode] = ["100"] * image_num
+        self.image_sizes[mode] = [None] * image_num
+        self.preview_cache.discard_mode(mode)
+        for index in range(image_num):
+            self.loading.pop((mode, index), None)
+            self.upgrading.pop((mode, index), None)
+            self.label_buffers.pop((mode, index), None)
+            self.thumbnails.discard((mode, index))
+        
+        # 이미지 라벨 초기화
+        for label in self.image_labels[mode]:
+            label.clear()
+            label.setText("이미지를 선택하세요")
+        
+        # 프레임 이미지 초기화
+        self.frame_image_path[mode] = ""
+        if self.frame_overlays[mode] is not None:
+            self.frame_overlays[mode].clear()
+
+        # 문구 라벨 초기화
+        for label in self.text_labels[mode]:
+            label.setText("")
+            font = QtGui.QFont(self.font, 12, QtGui.QFont.Normal, True)
+            label.setFont(font)
+
     def image_init(self):
         '''
         선택한 이미지를 초기화하는 함수
@@ -289,10 +448,17 @@ class Program(QtWidgets.QWidget):
         current_mode = self.ui.stackedWidget.currentIndex()
         index = self.image_labels[current_mode].index(self.clicked_label)
 
-        self.images[current_mode][index] = None
+        self.images.discard((current_mode, index))
+        self.update_memory_label()
         self.image_paths[current_mode][index] = None
         self.moved[current_mode][index] = None
         self.scale[current_mode][index] = "100"
+        self.image_sizes[current_mode][index] = None
+        self.preview_cache.discard((current_mode, index))
+        self.loading.pop((current_mode, index), None)
+        self.upgrading.pop((current_mode, index), None)
+        self.label_buffers.pop((current_mode, index), None)
+        self.thumbnails.discard((current_mode, index))
 
         self.clicked_label.clear()
         self.clicked_label.setText("이미지를 선택하세요")
@@ -301,26 +467,59 @@ class Program(QtWidgets.QWidget):
         self.ui.scale_lineEdit.setEnabled(False)
         self.ui.log_label.setText("")
 
+    def cv_to_qimage(self, cv_img):
+        '''
+        OpenCV 이미지를 변환/복사 없이 같은 메모리를 쓰는 QImage 로 감싸는 함수
+        BGR 은 Format_BGR888, BGRA 는 Format_ARGB32 (리틀 엔디언에서 메모리 순서가 B, G, R, A)를 사용한다.
+        QImage 는 배열 메모리를 참조만 하므로 QImage 를 쓰는 동안 cv_img 참조를 유지해야 하고,
+        배열은 행 단위로 연속(C-contiguous)이어야 한다.
+        '''
+        height, width = cv_img.shape[:2]
+        if cv_img.ndim == 2:
+            image_format = QtGui.QImage.Format_Grayscale8
+        elif cv_img.shape[2] == 4:
+            image_format = QtGui.QImage.Format_ARGB32
+        else:
+            image_format = QtGui.QImage.Format_BGR888
+        return QtGui.QImage(cv_img.data, width, height, cv_img.strides[0], image_format)
+
     def cv_to_pixmap(self, cv_img):
         '''
         OpenCV 이미지를 QPixmap으로 변환하는 함수
+        QPixmap.fromImage 에서 한 번만 복사한다.
         '''
         if cv_img is None:
             return None
-        height, width, channel = cv_img.shape
-        bytes_per_line = 3 * width
-        rgb_image = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-        q_img = QtGui.QImage(rgb_image.data, width, height, bytes_per_line, QtGui.QImage.Format_RGB888)
+        cv_img = np.ascontiguousarray(cv_img)  # fromImage 가 끝날 때까지 참조 유지
+        q_img = self.cv_to_qimage(cv_img)
         return QtGui.QPixmap.fromImage(q_img)
 
     def create_canvas(self, width, height):
         '''
         투명한 배경의 캔버스를 생성하는 함수
         '''
-        canvas = np.zeros((height, width, 3), dtype=np.uint8)
-        canvas.fill(255)  # 흰색 배경
-        return canvas
+        return engine.create_canvas(width, height)
     
+    def frame_pixmap(self, file_path):
+        '''
+        미리보기 크기의 프레임 QPixmap을 반환하는 함수
+        디코딩/리사이즈 결과는 출력과 같은 프레임 캐시를 사용한다.
+        '''
+        size = (self.width_px, self.height_px)
+        key = engine.frame_cache.make_key(file_path, size)
+        if key in self.frame_pixmaps:
+            return self.frame_pixmaps[key]
+
+        # OpenCV로 프레임 이미지 로드 (알파 채널 포함)
+        frame = engine.frame_cache.get(file_path, size)
+        if frame is None:
+            return None
+
+        # 캐시된 BGR(A) 배열을 채널 변환 없이 감싸서 한 번만 복사 (알파 채널 포함)
+        pixmap = self.cv_to_pixmap(frame)
+        self.frame_pixmaps[key] = pixmap
+        return pixmap
+
     def select_frame(self):
         '''
         프레임 이미지를 선택하는 함수
@@ -338,88 +537,84 @@ class Program(QtWidgets.QWidget):
         )
         
         if file_path:
-            # 파일 이름에 따라 current_index 설정
-            frame_name = os.path.basename(file_path)
-            current_index = -1
-            frame_widget = None
-            isVertical = False
-            if "2_horizontal" in frame_name or "2_가로" in frame_name:
-                current_index = 1
-            elif "2_vertical" in frame_name or "2_세로" in frame_name:
-                current_index = 2
-                isVertical = True
-            elif "4_horizontal" in frame_name or "4_가로" in frame_name:
-                current_index = 3
-            elif "4_vertical" in frame_name or "4_세로" in frame_name:
-                current_index = 4
-                isVertical = True
-            elif "6_horizontal" in frame_name or "6_가로" in frame_name:
-                current_index = 5
-            elif "6_vertical" in frame_name or "6_세로" in frame_name:
-                current_index = 6
-                isVertical = True
-            elif "9_horizontal" in frame_name or "9_가로" in frame_name:
-                current_index = 7
-            elif "9_vertical" in frame_name or "9_세로" in frame_name:
-                current_index = 8
-                isVertical = True
-            
-            frame_widget = self.frame_widgets[current_index]
-            if current_index == -1:
-                self.ui.log_label.setText("파일 네이밍이 규약에 맞지 않습니다.")
-                return
-            
-            self.width_px = self.px_15
-            self.height_px = self.px_10
-            if isVertical:
-                self.width_px = self.px_10
-                self.height_px = self.px_15
-            
-            # OpenCV로 프레임 이미지 로드 (알파 채널 포함)
-            stream = open(file_path, 'rb')
-            bytes = bytearray(stream.read())
-            numpyarray = np.asarray(bytes, dtype=np.uint8)
-            frame = cv2.imdecode(numpyarray, cv2.IMREAD_UNCHANGED)
-            if frame is not None:
-                frame = cv2.resize(frame, (self.width_px, self.height_px), 
-                                     interpolation=cv2.INTER_LANCZOS4)
-
-                # 알파 채널이 있는 경우 크기 조정
-                if frame.shape[2] == 4:
-                    # QImage로 변환 시 알파 채널 포함
-                    height, width, channel = frame.shape
-                    bytes_per_line = 4 * width
-                    q_img = QtGui.QImage(frame.data, width, height, bytes_per_line, QtGui.QImage.Format_RGBA8888)
-                else:
-                    # 알파 채널이 없는 경우 기존 방식
-                    height, width, channel = frame.shape
-                    bytes_per_line = 3 * width
-                    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    q_img = QtGui.QImage(rgb_image.data, width, height, bytes_per_line, QtGui.QImage.Format_RGB888)
-                
-                # 프레임 오버레이에 표시
-                overlay = self.frame_overlays[current_index]
-                overlay.setPixmap(QtGui.QPixmap.fromImage(q_img))
-                overlay.raise_()
-
-                # 문구 라벨을 최상단으로 올린다
-                for label in self.text_labels[current_index]:
-                    label.raise_()
-
-                frame_widget.setFixedSize(frame.shape[1], frame.shape[0])
-                self.ui.adjustSize()
-
-            # 스택 위젯의 인덱스를 파일 이름에 따라 설정
-            self.ui.stackedWidget.setCurrentIndex(current_index)
-            self.frame_image_path[current_index] = file_path
+            self.set_frame(file_path)
 
-            font = QtGui.QFont(self.font, 12, QtGui.QFont.Normal, True)
+    def set_frame(self, file_path):
+        '''
+        프레임 이미지 경로로 프레임 모드를 정하고 화면에 표시하는 함수
+        파일 이름이 규약에 맞지 않으면 -1 을 반환한다.
+        '''
+        # 파일 이름에 따라 current_index 설정
+        frame_name = os.path.basename(file_path)
+        current_index = -1
+        frame_widget = None
+        isVertical = False
+        if "2_horizontal" in frame_name or "2_가로" in frame_name:
+            current_index = 1
+        elif "2_vertical" in frame_name or "2_세로" in frame_name:
+            current_index = 2
+            isVertical = True
+        elif "4_horizontal" in frame_name or "4_가로" in frame_name:
+            current_index = 3
+        elif "4_vertical" in frame_name or "4_세로" in frame_name:
+            current_index = 4
+            isVertical = True
+        elif "6_horizontal" in frame_name or "6_가로" in frame_name:
+            current_index = 5
+        elif "6_vertical" in frame_name or "6_세로" in frame_name:
+            current_index = 6
+            isVertical = True
+        elif "9_horizontal" in frame_name or "9_가로" in frame_name:
+            current_index = 7
+        elif "9_vertical" in frame_name or "9_세로" in frame_name:
+            current_index = 8
+            isVertical = True
+        
+        frame_widget = self.frame_widgets[current_index]
+        if current_index == -1:
+            self.ui.log_label.setText("파일 네이밍이 규약에 맞지 않습니다.")
+            return -1
+        
+        self.width_px = self.px_15
+        self.height_px = self.px_10
+        if isVertical:
+            self.width_px = self.px_10
+            self.height_px = self.px_15
+        
+        pixmap = self.frame_pixmap(file_path)
+        if pixmap is not None:
+            # 프레임 오버레이에 표시
+            overlay = self.frame_overlays[current_index]
+            overlay.setPixmap(pixmap)
+            overlay.raise_()
+
+            # 문구 라벨을 최상단으로 올린다
             for label in self.text_labels[current_index]:
-                label.setFont(font)
-                label.setText("")
+                label.raise_()
 
-            self.ui.textEdit.setEnabled(True)
-            self.ui.font_lineEdit.setEnabled(True)
+            frame_widget.setFixedSize(pixmap.width(), pixmap.height())
+            self.ui.adjustSize()
+
+        # 스택 위젯의 인덱스를 파일 이름에 따라 설정
+        self.ui.stackedWidget.setCurrentIndex(current_index)
+        self.frame_image_path[current_index] = file_path
+
+        # 이전 모드의 사진은 한도를 넘으면 메모리에서 내리고, 내려갔거나 썸네일뿐인 현재 모드 사진은 다시 표시
+        self.images.set_visible(current_index)
+        for index in range(len(self.image_labels[current_index])):
+            key = (current_index, index)
+            if key in self.images and (self.images.peek(key) is None or key in self.thumbnails):
+                self.set_image_to_label(index, current_index)
+        self.update_memory_label()
+
+        font = QtGui.QFont(self.font, 12, QtGui.QFont.Normal, True)
+        for label in self.text_labels[current_index]:
+            label.setFont(font)
+            label.setText("")
+
+        self.ui.textEdit.setEnabled(True)
+        self.ui.font_lineEdit.setEnabled(True)
+        return current_index
 
     def select_image(self, index, label):
         '''
@@ -427,7 +622,7 @@ class Program(QtWidgets.QWidget):
         '''
         current_mode = self.ui.stackedWidget.currentIndex()
 
-        if self.images[current_mode][index] is not None:
+        if (current_mode, index) in self.images or (current_mode, index) in self.loading:
             return
 
         file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
@@ -436,52 +631,201 @@ class Program(QtWidgets.QWidget):
         )
         
         if file_path:
-            self.image_paths[current_mode][index] = file_path
-
-            # OpenCV로 이미지 로드
-            stream = open(file_path, 'rb')
-            bytes = bytearray(stream.read())
-            numpyarray = np.asarray(bytes, dtype=np.uint8)
-            cv_img = cv2.imdecode(numpyarray, cv2.IMREAD_COLOR)
-
-            if cv_img is not None:
-                self.images[current_mode][index] = cv_img.copy()
-
-                 # 라벨과 이미지의 크기 비율 계산
-                label_width = label.width()
-                label_height = label.height()
-                img_width = cv_img.shape[1]
-                img_height = cv_img.shape[0]
-                
-                # 가로, 세로 비율 중 더 작은 값을 선택하여 scale 계산
-                width_ratio = (label_width / img_width) * 100
-                height_ratio = (label_height / img_height) * 100
-                scale = min(width_ratio, height_ratio)
-                
-                # 소수점 첫째 자리까지 반올림
-                scale = math.ceil(scale)
-                
-                # scale이 100을 넘지 않도록 조정
-                if scale > 100:
-                    scale = 100
-                
-                self.scale[current_mode][index] = str(scale)
-                self.clicked_label = label
-                self.moved[current_mode][index] = None
-
-                self.ui.scale_lineEdit.setText(str(scale))
-                self.ui.scale_lineEdit.setEnabled(True)
-                
-                self.set_image_to_label(index)
+            self.load_image(current_mode, index, file_path)
+
+    def fill_images(self):
+        '''
+        여러 이미지를 한 번에 선택하여 빈 슬롯을 순서대로 채우는 함수
+        선택한 이미지는 모두 병렬로 디코딩한다.
+        '''
+        current_mode = self.ui.stackedWidget.currentIndex()
+        if current_mode == 0:
+            return
+
+        empty = [index for index in range(len(self.image_labels[current_mode]))
+                 if (current_mode, index) not in self.images and (current_mode, index) not in self.loading]
+        if not empty:
+            self.ui.log_label.setText("빈 칸이 없습니다.")
+            return
+
+        file_paths, _ = QtWidgets.QFileDialog.getOpenFileNames(
+            self, "이미지 선택 (최대 {}장)".format(len(empty)), "",
+            "Image Files (*.png *.jpg *.jpeg)"
+        )
+
+        for index, file_path in zip(empty, file_paths):
+            self.load_image(current_mode, index, file_path)
+
+        if len(file_paths) > len(empty):
+            self.ui.log_label.setText("빈 칸보다 많은 {}장은 제외했습니다.".format(len(file_paths) - len(empty)))
+
+    def load_image(self, mode, index, file_path):
+        '''
+        이미지 디코딩을 스레드 풀에 맡기고 라벨에 로딩 표시를 하는 함수
+        '''
+        self.image_paths[mode][index] = file_path
+        self.loading[(mode, index)] = file_path
+        self.upgrading.pop((mode, index), None)
+        self.thumbnails.discard((mode, index))
+
+        label = self.image_labels[mode][index]
+        label.clear()
+        label.setText("불러오는 중...")
+
+        worker = ImageLoadWorker(mode, index, file_path, (label.width(), label.height()))
+        worker.signals.loaded.connect(self.image_loaded)
+        self.start_load_worker(worker)
+
+    def start_load_worker(self, worker):
+        self.load_workers.append(worker)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def finish_load_worker(self, mode, index, file_path):
+        self.load_workers = [worker for worker in self.load_workers
+                             if not (worker.mode == mode and worker.index == index and worker.file_path == file_path)]
+
+    def image_loaded(self, mode, index, file_path, cv_img, orig_size):
+        '''
+        이미지 디코딩이 끝났을 때 실행되는 함수
+        '''
+        self.finish_load_worker(mode, index, file_path)
+
+        # 디코딩 중에 초기화되었거나 다른 이미지로 바뀐 경우 무시
+        if self.loading.get((mode, index)) != file_path:
+            return
+        del self.loading[(mode, index)]
+
+        label = self.image_labels[mode][index]
+        if cv_img is None:
+            self.image_paths[mode][index] = None
+            label.setText("이미지를 선택하세요")
+            self.ui.log_label.setText("이미지를 불러오지 못했습니다.")
+            return
+
+        self.image_sizes[mode][index] = orig_size
+        self.preview_cache.discard((mode, index))
+        self.images.put((mode, index), cv_img, file_path, orig_size == (cv_img.shape[1], cv_img.shape[0]))
+        self.update_memory_label()
+
+        scale = self.fit_scale(label, orig_size)
+        self.scale[mode][index] = str(scale)
+        self.moved[mode][index] = None
+        self.set_image_to_label(index, mode)
+
+        if mode == self.ui.stackedWidget.currentIndex():
+            self.clicked_label = label
+            self.ui.scale_lineEdit.setText(str(scale))
+            self.ui.scale_lineEdit.setEnabled(True)
+
+    def fit_scale(self, label, orig_size):
+        '''
+        사진을 라벨에 꽉 차게 맞추는 scale 을 계산하는 함수
+        '''
+        # 라벨과 원본 이미지의 크기 비율 계산
+        label_width = label.width()
+        label_height = label.height()
+        img_width, img_height = orig_size
+        
+        # 가로, 세로 비율 중 더 작은 값을 선택하여 scale 계산
+        width_ratio = (label_width / img_width) * 100
+        height_ratio = (label_height / img_height) * 100
+        scale = min(width_ratio, height_ratio)
+        
+        # 소수점 첫째 자리까지 반올림
+        scale = math.ceil(scale)
+        
+        # scale이 100을 넘지 않도록 조정
+        if scale > 100:
+            scale = 100
+        return scale
+
+    def is_full_resolution(self, mode, index):
+        '''
+        슬롯의 미리보기 이미지가 전체 해상도로 디코딩되었는지 확인하는 함수
+        '''
+        return self.images.is_full((mode, index))
+
+    def upgrade_image(self, mode, index):
+        '''
+        축소 디코딩한 이미지보다 크게 확대했을 때 전체 해상도로 다시 디코딩하는 함수
+        썸네일을 표시 중이면 먼저 라벨 크기에 맞춰 축소 디코딩한다.
+        디코딩하는 동안에는 지금 이미지를 확대해서 보여준다.
+        '''
+        file_path = self.image_paths[mode][index]
+        if (mode, index) in self.upgrading or (mode, index) in self.loading or not file_path:
+            return
+        self.upgrading[(mode, index)] = file_path
+
+        label_size = None
+        cap_factor = None
+        if (mode, index) in self.thumbnails:
+            label = self.image_labels[mode][index]
+            label_size = (label.width(), label.height())
+        elif engine.CAP_ORIGINALS:
+            cap_factor = self.cap_factor(mode, index)
+
+        worker = ImageLoadWorker(mode, index, file_path, label_size, cap_factor)
+        worker.signals.loaded.connect(self.image_upgraded)
+        self.start_load_worker(worker)
+
+    def cap_factor(self, mode, index):
+        '''
+        크기 제한 모드에서 슬롯 사진을 원본의 몇 배 크기로 보관할지 계산하는 함수
+        지금 스케일의 CAP_HEADROOM 배까지 확대했을 때 어떤 출력 프로파일로 내보내도
+        필요한 해상도가 모자라지 않는 크기이다. 그보다 더 확대하면 다시 디코딩한다.
+        '''
+        scale_ratio = float(self.scale[mode][index]) * 0.01 * engine.CAP_HEADROOM
+        return scale_ratio * profiles.max_output_scale((self.width_px, self.height_px))
+
+    def image_upgraded(self, mode, index, file_path, cv_img, orig_size):
+        '''
+        다시 디코딩이 끝났을 때 실행되는 함수
+        스케일과 이동값은 원본 기준이므로 그대로 두고 이미지만 교체한다.
+        '''
+        self.finish_load_worker(mode, index, file_path)
+
+        if self.upgrading.get((mode, index)) != file_path:
+            return
+        del self.upgrading[(mode, index)]
+
+        if cv_img is None or self.image_paths[mode][index] != file_path:
+            return
+
+        self.image_sizes[mode][index] = orig_size
+        self.thumbnails.discard((mode, index))
+        self.preview_cache.discard((mode, index))
+        self.images.put((mode, index), cv_img, file_path, orig_size == (cv_img.shape[1], cv_img.shape[0]))
+        self.update_memory_label()
+        self.set_image_to_label(index, mode)
+
+    def reload_image(self, key, file_path, full):
+        '''
+        메모리에서 내려간 사진을 원본 파일에서 다시 디코딩하는 함수
+        '''
+        try:
+            if full:
+                return engine.read_image(file_path)
+            label = self.image_labels[key[0]][key[1]]
+            cv_img, _ = preview.load_preview_image(file_path, (label.width(), label.height()))
+            return cv_img
+        except OSError as e:
+            print(f"Error loading image: {e}")
+            return None
+
+    def update_memory_label(self):
+        '''
+        사진 메모리 사용량을 표시하는 함수
+        '''
+        self.ui.memory_label.setText(self.images.format_usage())
     
     def zoom_inout(self, index, label, dir):
         '''
         사진을 줌인/아웃하는 함수
         '''
-        if self.images[index] is None:
-            return
-        
         current_mode = self.ui.stackedWidget.currentIndex()
+
+        if (current_mode, index) not in self.images:
+            return
         
         scale = float(self.scale[current_mode][index])
 
@@ -500,77 +844,57 @@ class Program(QtWidgets.QWidget):
         image_index = index + 1
         self.ui.log_label.setText("Image {} selected".format(image_index))
 
-        self.set_image_to_label(index)
+        self.schedule_render(index)
 
-    def set_image_to_label(self, index):
+    def set_image_to_label(self, index, mode=None, interpolation=cv2.INTER_LANCZOS4):
         '''
         이미지를 라벨에 표시하는 함수
+        mode 를 지정하지 않으면 현재 화면의 모드를 사용한다.
+        드래그 중에는 interpolation 에 빠른 보간 방법을 넘긴다.
         '''
-        current_mode = self.ui.stackedWidget.currentIndex()
+        current_mode = self.ui.stackedWidget.currentIndex() if mode is None else mode
 
         label = self.image_labels[current_mode][index]
-        cv_img = self.images[current_mode][index]
+        cv_img = self.images.get((current_mode, index))
         if cv_img is None:
             return
 
-        # 스케일 적용
+        # 스케일은 원본 크기 기준이므로 원본 크기로 배율 계산
         scale_ratio = float(self.scale[current_mode][index]) * 0.01
-        width = int(cv_img.shape[1] * scale_ratio)
-        height = int(cv_img.shape[0] * scale_ratio)
-        scaled_img = cv2.resize(cv_img, (width, height), interpolation=cv2.INTER_LANCZOS4)
-
-        # 라벨 크기의 캔버스 생성
-        canvas = self.create_canvas(label.width(), label.height())
-
-        # 이동값 적용 또는 왼쪽 정렬
-        if self.moved[current_mode][index]:
-            diff_x, diff_y = self.moved[current_mode][index]
-            x = diff_x
-            y = diff_y
-        else:
-            x = 0
-            y = 0
-
-        # 이미지를 캔버스에 복사
+        orig_size = self.image_sizes[current_mode][index]
+        size = (max(1, int(orig_size[0] * scale_ratio)), max(1, int(orig_size[1] * scale_ratio)))
+        if (current_mode, index) in self.thumbnails or \
+                (size[0] > cv_img.shape[1] and not self.is_full_resolution(current_mode, index)):
+            self.upgrade_image(current_mode, index)
+        source = self.preview_cache.source((current_mode, index), cv_img, size)
+
+        # 라벨마다 유지하는 버퍼에 출력과 같은 변환으로 다시 그리기 (라벨 좌표 = 미리보기 좌표)
+        buffer = self.label_buffer(current_mode, index, label)
         try:
-            # 이미지가 캔버스 범위 내에 있는 부분만 복사
-            y1 = max(0, int(y))
-            y2 = min(label.height(), int(y + height))
-            x1 = max(0, int(x))
-            x2 = min(label.width(), int(x + width))
-
-            if y2 > y1 and x2 > x1:
-                # 원본 이미지에서 복사할 영역 계산
-                img_y1 = max(0, -int(y))
-                img_x1 = max(0, -int(x))
-                img_y2 = img_y1 + (y2 - y1)
-                img_x2 = img_x1 + (x2 - x1)
-
-                canvas[y1:y2, x1:x2] = scaled_img[img_y1:img_y2, img_x1:img_x2]
-            
-            # 중앙선 그리기
-            # 가로 중앙선
-            center_y = label.height() // 2
-            cv2.line(canvas, 
-                    (0, center_y), 
-                    (label.width(), center_y), 
-                    (0, 0, 255),  # BGR 색상 (빨간색)
-                    1)  # 선 두께
-            
-            # 세로 중앙선
-            center_x = label.width() // 2
-            cv2.line(canvas, 
-                    (center_x, 0), 
-                    (center_x, label.height()), 
-                    (0, 0, 255),  # BGR 색상 (빨간색)
-                    1)  # 선 두께
+            buffer["region"] = preview.draw_slot(buffer["canvas"], buffer["region"], source,
+                                                 self.scale[current_mode][index], self.moved[current_mode][index],
+                                                 orig_size, interpolation)
         except ValueError as e:
             print(f"Error copying image: {e}")
 
-        # OpenCV 이미지를 QPixmap으로 변환하여 라벨에 표시
-        pixmap = self.cv_to_pixmap(canvas)
-        label.setPixmap(pixmap)
-        label.update()
+        # 버퍼를 공유하는 QImage 로 QPixmap 을 갱신하여 라벨에 표시
+        buffer["pixmap"].convertFromImage(buffer["qimage"])
+        label.setPixmap(buffer["pixmap"])
+
+    def label_buffer(self, mode, index, label):
+        '''
+        라벨의 미리보기 버퍼 (흰색 캔버스, 같은 메모리를 쓰는 QImage, QPixmap)를 반환하는 함수
+        라벨 크기가 바뀌면 새로 만든다.
+        '''
+        width, height = label.width(), label.height()
+        buffer = self.label_buffers.get((mode, index))
+        if buffer is None or buffer["canvas"].shape[:2] != (height, width):
+            canvas = self.create_canvas(width, height)
+            qimage = self.cv_to_qimage(canvas)  # canvas 는 buffer 에 함께 보관
+            buffer = {"canvas": canvas, "qimage": qimage, "pixmap": QtGui.QPixmap(width, height),
+                      "region": (0, 0, 0, 0)}
+            self.label_buffers[(mode, index)] = buffer
+        return buffer
 
     def drag_started(self, index, x, y):
         '''
@@ -610,15 +934,55 @@ class Program(QtWidgets.QWidget):
             self.moved[current_mode][index] = (prev_x + diff_x, prev_y + diff_y)
 
         self.start_pos = (x, y)
-        self.set_image_to_label(index)
+        self.schedule_render(index)
 
     def drag_ended(self):
         '''
         이미지 드래그 앤 드롭을 종료했을 때 실행되는 함수
+        아직 그리지 않은 이동값을 포함하여 LANCZOS 로 다시 그린다.
         '''
         self.is_move_mode = False
         self.start_pos = None
 
+        self.render_timer.stop()
+        self.draft_renders.update(self.pending_renders)
+        self.pending_renders.clear()
+        self.settle_renders()
+
+    def schedule_render(self, index):
+        '''
+        슬롯을 다음 프레임에 다시 그리도록 예약하는 함수
+        예약된 동안 들어온 이동/휠 입력은 한 번에 그려진다.
+        '''
+        current_mode = self.ui.stackedWidget.currentIndex()
+        self.pending_renders.add((current_mode, index))
+        if not self.render_timer.isActive():
+            self.render_timer.start()
+
+    def flush_renders(self):
+        '''
+        예약된 슬롯을 빠른 보간으로 그리는 함수
+        '''
+        for mode, index in self.pending_renders:
+            self.set_image_to_label(index, mode, cv2.INTER_LINEAR)
+            self.draft_renders.add((mode, index))
+        self.pending_renders.clear()
+
+        # 드래그는 마우스를 놓을 때, 휠은 입력이 멈춘 뒤 고화질로 다시 그린다
+        if not self.is_move_mode:
+            self.settle_timer.start()
+
+    def settle_renders(self):
+        '''
+        빠른 보간으로 그렸던 슬롯을 LANCZOS 로 다시 그리는 함수
+        '''
+        if self.is_move_mode:
+            return
+        self.settle_timer.stop()
+        for mode, index in self.draft_renders:
+            self.set_image_to_label(index, mode)
+        self.draft_renders.clear()
+
     def scale_changed(self):
         '''
         scale 값이 변경되었을 때 실행되는 함수
@@ -689,320 +1053,299 @@ class Program(QtWidgets.QWidget):
             label = self.text_labels[current_mode][0]
             label.setText(text)
 
+    def build_project(self):
+        '''
+        모든 프레임 모드의 화면 상태를 프로젝트 dict 로 만드는 함수
+        메모리에 있는 사진은 썸네일을 함께 저장한다.
+        '''
+        modes = {}
+        for mode in range(1, len(self.image_labels)):
+            if not self.frame_image_path[mode]:
+                continue
+
+            slots = []
+            for index in range(len(self.image_labels[mode])):
+                file_path = self.image_paths[mode][index]
+                if file_path and (mode, index) in self.loading:
+                    slots.append(self.loading_slot(mode, index, file_path))
+                    continue
+                if not file_path or (mode, index) not in self.images:
+                    slots.append({"image_path": None})
+                    continue
+
+                moved = self.moved[mode][index]
+                orig_size = self.image_sizes[mode][index]
+                slot = {
+                    "image_path": file_path,
+                    "orig_size": list(orig_size) if orig_size else None,
+                    "scale": self.scale[mode][index],
+                    "moved": list(moved) if moved else None
+                }
+                cv_img = self.images.peek((mode, index))
+                if cv_img is not None:
+                    slot["thumbnail"] = project.encode_thumbnail(cv_img)
+                slots.append(slot)
+
+            texts = [{"text": label.text(), "font_size": label.font().pointSize()}
+                     for label in self.text_labels[mode]]
+            modes[mode] = {"frame_path": self.frame_image_path[mode], "slots": slots, "texts": texts}
+
+        return {
+            "profile": self.output_profile,
+            "current_mode": self.ui.stackedWidget.currentIndex(),
+            "modes": modes
+        }
+
+    def loading_slot(self, mode, index, file_path):
+        '''
+        아직 디코딩 중인 슬롯을 불러오기가 끝났을 때와 같은 배치로 저장하는 함수
+        원본 크기는 헤더만 읽고, scale 은 image_loaded 와 같이 라벨에 맞춘다.
+        '''
+        try:
+            orig_size = engine.image_size(file_path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading image size: {e}")
+            return {"image_path": file_path}
+
+        scale = self.fit_scale(self.image_labels[mode][index], orig_size)
+        return {"image_path": file_path, "orig_size": list(orig_size), "scale": str(scale), "moved": None}
+
+    def save_project(self):
+        '''
+        프로젝트를 파일로 저장하는 함수
+        '''
+        save_path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "프로젝트 저장", "", project.PROJECT_FILTER)
+        if not save_path:
+            return
+
+        try:
+            project.save_project(save_path, self.build_project())
+            self.ui.log_label.setText("프로젝트를 저장했습니다.")
+        except (OSError, ValueError) as e:
+            print(e)
+            self.ui.log_label.setText("프로젝트 저장 중 오류가 발생했습니다.")
+
+    def open_project(self):
+        '''
+        프로젝트 파일을 불러오는 함수
+        사진은 썸네일만 먼저 보여주고, 원본은 화면에 보이거나 출력할 때 디코딩한다.
+        '''
+        file_path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "프로젝트 열기", "", project.PROJECT_FILTER)
+        if not file_path:
+            return
+
+        try:
+            data = project.load_project(file_path)
+        except (OSError, ValueError) as e:
+            print(e)
+            self.ui.log_label.setText("프로젝트를 불러오지 못했습니다.")
+            return
+
+        profile_index = self.ui.profile_comboBox.findData(data.get("profile"))
+        if profile_index >= 0:
+            self.ui.profile_comboBox.setCurrentIndex(profile_index)
+
+        # 현재 모드를 마지막에 적용하여 화면에 남긴다
+        current_mode = data["current_mode"]
+        modes = sorted(data["modes"], key=lambda mode: mode == current_mode)
+        missing = 0
+        for mode in modes:
+            missing += self.apply_project_mode(mode, data["modes"][mode])
+
+        # 화면에 보이는 모드의 슬롯만 그린다 (다른 모드는 set_frame 으로 바꿀 때 그린다)
+        visible_mode = self.ui.stackedWidget.currentIndex()
+        for index in range(len(self.image_labels[visible_mode])):
+            if (visible_mode, index) in self.images:
+                self.set_image_to_label(index, visible_mode)
+
+        self.clicked_label = None
+        self.update_memory_label()
+        if missing:
+            self.ui.log_label.setText("찾을 수 없는 파일 {}개는 제외했습니다.".format(missing))
+        else:
+            self.ui.log_label.setText("프로젝트를 불러왔습니다.")
+
+    def apply_project_mode(self, mode, state):
+        '''
+        프로젝트의 한 프레임 모드 상태를 적용하는 함수
+        사진은 저장소에 넣기만 하고 그리지 않는다. 찾을 수 없는 파일 수를 반환한다.
+        '''
+        self.clear_mode(mode)
+        frame_path = state.get("frame_path")
+        if not frame_path or not os.path.exists(frame_path):
+            return 1
+        if self.set_frame(frame_path) != mode:
+            return 1
+
+        missing = 0
+        for index, slot in enumerate(state.get("slots", [])[:len(self.image_labels[mode])]):
+            file_path = slot.get("image_path")
+            if not file_path:
+                continue
+            if not os.path.exists(file_path):
+                missing += 1
+                continue
+
+            orig_size = slot.get("orig_size")
+            if not orig_size:
+                orig_size = engine.image_size(file_path)
+            moved = slot.get("moved")
+
+            self.image_paths[mode][index] = file_path
+            self.image_sizes[mode][index] = tuple(orig_size)
+            self.scale[mode][index] = str(slot.get("scale", "100"))
+            self.moved[mode][index] = tuple(moved) if moved else None
+
+            # 썸네일이 있으면 바로 보여주고, 없으면 보일 때 원본에서 디코딩
+            thumbnail = project.decode_thumbnail(slot["thumbnail"]) if slot.get("thumbnail") else None
+            if thumbnail is not None:
+                self.images.put((mode, index), thumbnail, file_path, False)
+                self.thumbnails.add((mode, index))
+            else:
+                self.images.put_path((mode, index), file_path)
+
+        for label, text in zip(self.text_labels[mode], state.get("texts", [])):
+            font = QtGui.QFont(self.font, int(text.get("font_size", 12)), QtGui.QFont.Normal, True)
+            label.setFont(font)
+            label.setText(text.get("text", ""))
+        return missing
+
+    def build_layout(self, current_mode):
+        '''
+        현재 모드의 화면 상태를 직렬화 가능한 레이아웃으로 만드는 함수
+        '''
+        frame_widget = self.frame_widgets[current_mode]
+
+        def label_rect(label):
+            pos = label.mapTo(frame_widget, QtCore.QPoint(0, 0))
+            return [pos.x(), pos.y(), label.width(), label.height()]
+
+        slots = []
+        for idx, label in enumerate(self.image_labels[current_mode]):
+            moved = self.moved[current_mode][idx]
+            orig_size = self.image_sizes[current_mode][idx]
+            slots.append({
+                "rect": label_rect(label),
+                "image_path": self.image_paths[current_mode][idx],
+                "scale": self.scale[current_mode][idx],
+                "moved": list(moved) if moved else None,
+                "orig_size": list(orig_size) if orig_size else None
+            })
+
+        texts = []
+        for text_label in self.text_labels[current_mode]:
+            texts.append({
+                "rect": label_rect(text_label),
+                "text": text_label.text(),
+                "font_size": text_label.font().pointSize()
+            })
+
+        layout = {
+            "frame_path": self.frame_image_path[current_mode],
+            "preview_size": [self.width_px, self.height_px],
+            "screen_dpi": QtWidgets.QApplication.primaryScreen().logicalDotsPerInch(),
+            "font_path": self.font_path,
+            "slots": slots,
+            "texts": texts
+        }
+        return profiles.apply_profile(layout, self.output_profile)
+
+    def profile_changed(self, combo_index):
+        '''
+        출력 프로파일이 변경되었을 때 실행되는 함수
+        출력 크기와 예상 메모리/시간을 표시한다.
+        '''
+        self.output_profile = self.ui.profile_comboBox.itemData(combo_index)
+        try:
+            layout = profiles.apply_profile({"preview_size": [self.width_px, self.height_px]}, self.output_profile)
+        except ValueError as e:
+            print(e)
+            self.ui.log_label.setText(str(e))
+            return
+        self.ui.log_label.setText(profiles.format_estimate(profiles.estimate(layout)))
+
     def export_image(self):
         '''
         이미지를 추출하는 함수
+        저장 경로를 먼저 받은 뒤 렌더링은 백그라운드에서 진행한다.
         '''
         try:
             self.ui.log_label.setText("")
             current_mode = self.ui.stackedWidget.currentIndex()
 
-            # 고해상도 설정
-            target_dpi = 1200
-            current_dpi = QtGui.QGuiApplication.primaryScreen().logicalDotsPerInch()
-            dpi_ratio = target_dpi / current_dpi
-            width_px = int((15 * target_dpi) / 2.54)
-            height_px = int((10 * target_dpi) / 2.54)
-            if self.width_px == self.px_10: # 세로 방향
-                width_px = int((10 * target_dpi) / 2.54)
-                height_px = int((15 * target_dpi) / 2.54)
-            
-            # 결과 이미지 생성
-            result_image = self.create_canvas(width_px, height_px)
-
-            # 화면 크기와 출력 크기의 비율 계산
-            scale_x = width_px / self.width_px
-            scale_y = height_px / self.height_px
-
-            frame_widget = self.frame_widgets[current_mode]
-
-            for idx, label in enumerate(self.image_labels[current_mode]):
-                if self.images[current_mode][idx] is None:
-                    continue  # 이미지가 없으면 건너뛰기
-
-                cv_img = self.images[current_mode][idx]
-                
-                # 스케일 적용
-                scale_ratio = float(self.scale[current_mode][idx]) * 0.01
-                width = int(cv_img.shape[1] * scale_ratio * scale_x)
-                height = int(cv_img.shape[0] * scale_ratio * scale_y)
-                scaled_img = cv2.resize(cv_img, (width, height), interpolation=cv2.INTER_LANCZOS4)
-
-                # 라벨 위치 계산
-                pos = label.mapTo(
-                    frame_widget, 
-                    QtCore.QPoint(0, 0)
-                )
-                
-                # 출력 이미지에서의 위치와 크기 계산
-                target_x = int(pos.x() * scale_x)
-                target_y = int(pos.y() * scale_y)
-                target_width = int(label.width() * scale_x)
-                target_height = int(label.height() * scale_y)
-
-                # 이미지 복사 (라벨에 보여지는 부분만)
-                try:
-                    # 라벨의 경계 계산 (스케일 적용)
-                    label_x = int(pos.x() * scale_x)
-                    label_y = int(pos.y() * scale_y)
-                    label_right = label_x + int(label.width() * scale_x)
-                    label_bottom = label_y + int(label.height() * scale_y)
-
-                    if self.moved[current_mode][idx]:
-                        diff_x, diff_y = self.moved[current_mode][idx]
-                        x = int(diff_x * scale_x)
-                        y = int(diff_y * scale_y)
-                    else:
-                        x = 0
-                        y = 0
-
-                    # 이미지가 캔버스 범위 내에 있는 부분만 복사
-                    y1 = max(label_y, int(target_y + y))
-                    y2 = min(label_bottom, int(target_y + y + height))
-                    x1 = max(label_x, int(target_x + x))
-                    x2 = min(label_right, int(target_x + x + width))
-
-                    if y2 > y1 and x2 > x1:
-                        # 원본 이미지에서 복사할 영역 계산
-                        img_y1 = max(0, int(-(target_y + y - label_y)))
-                        img_x1 = max(0, int(-(target_x + x - label_x)))
-                        img_y2 = img_y1 + (y2 - y1)
-                        img_x2 = img_x1 + (x2 - x1)
-
-                        # 이미지 복사
-                        result_image[y1:y2, x1:x2] = scaled_img[img_y1:img_y2, img_x1:img_x2]
-
-                except ValueError as e:
-                    print(f"Error copying image {idx}: {e}")
-
-            # 프레임 이미지 추가
-            frame_path = self.frame_image_path[current_mode]
-            if os.path.exists(frame_path):
-                stream = open(frame_path, 'rb')
-                bytes = bytearray(stream.read())
-                numpyarray = np.asarray(bytes, dtype=np.uint8)
-                # IMREAD_UNCHANGED로 변경하여 알파 채널을 포함하여 로드
-                frame = cv2.imdecode(numpyarray, cv2.IMREAD_UNCHANGED)
-                if frame is not None:
-                    frame = cv2.resize(frame, (width_px, height_px), 
-                                     interpolation=cv2.INTER_LANCZOS4)
-                    
-                    # BGR 이미지로 변환
-                    if frame.shape[2] == 4:  # 알파 채널이 있는 경우
-                        # 알파 채널 분리
-                        alpha = frame[:, :, 3]
-                        frame_bgr = frame[:, :, :3]
-                        
-                        # 알파 채널을 0-1 범위로 정규화
-                        alpha = alpha.astype(float) / 255
-                        
-                        # 알파 블렌딩 수행
-                        for c in range(3):  # BGR 각 채널에 대해
-                            result_image[:, :, c] = (1 - alpha) * result_image[:, :, c] + alpha * frame_bgr[:, :, c]
-                    else:  # 알파 채널이 없는 경우
-                        # 단순히 프레임으로 덮어쓰기
-                        result_image = frame.copy()
-            
-            # 텍스트 추가
-            if self.width_px == self.px_15: # 가로 방향
-                text_labels = self.text_labels[current_mode]
-                for text_label in text_labels:
-                    text = text_label.text()
-                    if text:
-                        # 텍스트 라벨의 위치 및 크기 계산
-                        target_width = int(text_label.width() * scale_x)    # 텍스트 라벨의 가로 (스케일 적용)
-                        target_height = int(text_label.height() * scale_y)  # 텍스트 라벨의 세로 (스케일 적용)
-                        text_pos = text_label.mapTo(frame_widget, QtCore.QPoint(0, 0))
-                        text_x = int(text_pos.x() * scale_x)
-                        text_y = int(text_pos.y() * scale_y)
-
-                        # 한글 폰트 설정
-                        orig_font_size = text_label.font().pointSize()
-                        
-                        # DPI 기반 스케일링 계산
-                        screen = QtWidgets.QApplication.primaryScreen()
-                        dpi_scale = screen.logicalDotsPerInch() / 96.0
-                        
-                        # 실제 보이는 폰트 크기 계산 (DPI 스케일링 고려)
-                        actual_font_size = int(orig_font_size * dpi_scale)
-                        
-                        # 출력용 폰트 크기 계산 (실제 보이는 크기 기준)
-                        font_size = int(actual_font_size * (target_dpi / 96.0))  # target_dpi는 1200
-                        
-                        font = ImageFont.truetype(self.font_path, font_size)
-
-                        # OpenCV 이미지를 PIL로 변환
-                        result_image_pil = Image.fromarray(cv2.cvtColor(result_image, cv2.COLOR_BGR2RGB))
-
-                        # 텍스트를 줄 단위로 분리
-                        lines = text.split('\n')
-                        
-                        # 전체 높이 계산 (모든 줄의 높이 합)
-                        total_text_height = 0
-                        line_heights = []
-                        for line in lines:
-                            line_height = len(line) * int(font_size * 1.2)  # 줄 간격
-                            line_heights.append(line_height)
-                            total_text_height += line_height
-
-                        # 수직 중앙 정렬을 위한 시작 y 위치 계산
-                        start_y = (target_height - total_text_height) / 2
-                        current_y = start_y
-                        
-                        # 각 줄에 대해 처리
-                        for line_idx, line in enumerate(lines):
-                            # 각 줄의 문자를 세로로 그리기
-                            for char_idx, char in enumerate(line):
-                                # 현재 문자의 크기 계산
-                                bbox = font.getbbox(char)
-                                char_width = bbox[2] - bbox[0]
-                                char_height = bbox[3] - bbox[1]
-                                
-                                # 라벨 위치에 따라 정렬 방식 다르게 적용
-                                label_index = self.text_labels[current_mode].index(text_label)
-                                if label_index == 0:  # 첫 번째 라벨 - 오른쪽 정렬
-                                    x_position = text_x + (target_width - char_width)
-                                elif label_index == 1:  # 두 번째 라벨 - 중앙 정렬
-                                    x_position = text_x + (target_width - char_width) / 2
-                                else:  # 세 번째 라벨 - 왼쪽 정렬
-                                    x_position = text_x
-
-                                y_position = current_y + (char_idx * int(font_size * 1.2))
-                                
-                                # 문자 그리기 (기울임 효과 적용)
-                                padding = int(font_size * 0.3)
-                                temp_img = Image.new('RGBA', 
-                                                   (int(char_width * 2), int(font_size * 1.5)),  # 임시 이미지 크기 조정
-                                                   (255, 255, 255, 0))
-                                temp_draw = ImageDraw.Draw(temp_img)
-                                
-                                # 임시 이미지에 문자 그리기
-                                temp_draw.text((padding, padding/2), char, font=font, fill=(0, 0, 0))
-                                
-                                # 기울임 변환 행렬 (shear transform)
-                                shear_factor = 0.3  # 기울기 유지
-                                temp_img = temp_img.transform(
-                                    temp_img.size,
-                                    Image.AFFINE,
-                                    (1, shear_factor, 0, 0, 1, 0),
-                                    Image.BICUBIC
-                                )
-                                
-                                # 기울어진 문자를 원본 이미지에 합성 (위치 조정)
-                                paste_x = max(0, int(x_position - padding))  # 왼쪽으로 이동 감소
-                                paste_y = max(0, int(y_position))
-                                result_image_pil.paste(temp_img, (paste_x, paste_y), temp_img)
-                            
-                            # 다음 줄의 시작 y 위치 업데이트
-                            current_y += line_heights[line_idx] + orig_font_size  # 줄 간격 추가
-
-                        # PIL 이미지를 OpenCV로 다시 변환
-                        result_image = cv2.cvtColor(np.array(result_image_pil), cv2.COLOR_RGB2BGR)
-            else:
-                text_label = self.text_labels[current_mode][0]
-                text = text_label.text()
-                if text:
-                    # 텍스트 라벨의 위치 및 크기 계산
-                    target_width = int(text_label.width() * scale_x)
-                    target_height = int(text_label.height() * scale_y)
-                    text_pos = text_label.mapTo(frame_widget, QtCore.QPoint(0, 0))
-                    text_x = int(text_pos.x() * scale_x)
-                    text_y = int(text_pos.y() * scale_y)
-
-                    # 한글 폰트 설정
-                    orig_font_size = text_label.font().pointSize()
-
-                    # DPI 기반 스케일링 계산
-                    screen = QtWidgets.QApplication.primaryScreen()
-                    dpi_scale = screen.logicalDotsPerInch() / 96.0
-                        
-                    # 실제 보이는 폰트 크기 계산 (DPI 스케일링 고려)
-                    actual_font_size = int(orig_font_size * dpi_scale)
-                        
-                    # 출력용 폰트 크기 계산 (실제 보이는 크기 기준)
-                    font_size = int(actual_font_size * (target_dpi / 96.0))  # target_dpi는 1200
-
-                    font = ImageFont.truetype(self.font_path, font_size)
-                        
-                    padding = int(font_size)
-                    
-                    # OpenCV 이미지를 PIL로 변환
-                    result_image_pil = Image.fromarray(cv2.cvtColor(result_image, cv2.COLOR_BGR2RGB))
-
-                    lines = text.split('\n')
-                    line_height = font_size + orig_font_size  # 줄 간격 조정
-                    
-                    # 텍스트 블록을 라벨 내에서 수직 중앙 정렬
-                    start_y = text_y + int(font_size * 0.2)
-                    
-                    # 각 줄의 텍스트 그리기
-                    for i, line in enumerate(lines):
-                        # 텍스트 크기 계산
-                        bbox = font.getbbox(line)
-                        text_width = bbox[2] - bbox[0]
-                        
-                        # 기울어진 텍스트를 위한 더 넓은 임시 이미지 생성
-                        temp_width = int(text_width * 1.5)  # 기울기를 위한 여유 공간
-                        temp_img = Image.new('RGBA', 
-                                           (temp_width, int(font_size * 2)),
-                                           (255, 255, 255, 0))
-                        temp_draw = ImageDraw.Draw(temp_img)
-                        
-                        # 임시 이미지의 중앙에 텍스트 그리기
-                        temp_x = (temp_width - text_width) // 2
-                        temp_draw.text((temp_x, padding/2), line, font=font, fill=(0, 0, 0))
-                        
-                        # 기울임 변환 행렬 적용
-                        shear_factor = 0.3
-                        temp_img = temp_img.transform(
-                            temp_img.size,
-                            Image.AFFINE,
-                            (1, shear_factor, 0, 0, 1, 0),
-                            Image.BICUBIC
-                        )
-                        
-                        # 기울어진 텍스트의 실제 너비 계산
-                        temp_array = np.array(temp_img)
-                        non_empty = np.where(temp_array[:,:,3] > 0)
-                        if len(non_empty[1]) > 0:
-                            left_edge = non_empty[1].min()
-                            right_edge = non_empty[1].max()
-                            actual_width = right_edge - left_edge
-                            
-                            # 최종 이미지에서의 위치 계산 (중앙 정렬)
-                            x_position = text_x + (target_width - actual_width) // 2
-                            # left_edge만큼 왼쪽으로 이동하여 보정
-                            x_position -= left_edge
-                        else:
-                            x_position = text_x
-                            
-                        y_position = start_y + (i * line_height)
-                        
-                        # 기울어진 텍스트를 원본 이미지에 합성
-                        result_image_pil.paste(temp_img, (int(x_position), int(y_position)), temp_img)
-
-                    # PIL 이미지를 OpenCV로 다시 변환
-                    result_image = cv2.cvtColor(np.array(result_image_pil), cv2.COLOR_RGB2BGR)
-
-            # 파일 저장
+            # 파일 저장 경로
             save_path, selected_filter = QtWidgets.QFileDialog.getSaveFileName(
                 self, "Save Image", "", 
                 "PNG Files (*.png);;JPEG Files (*.jpg *.jpeg);;All Files (*)"
             )
-            
-            if save_path:
-                file_type = os.path.splitext(save_path)[1]
-                ret, img_arr = cv2.imencode(file_type, result_image)
-                if ret:
-                    with open(save_path, mode='w+b') as f:                
-                        img_arr.tofile(f)
+            if not save_path:
+                return
 
-                self.ui.log_label.setText("이미지를 저장했습니다.")
+            # 화면 상태는 지금 복사해 두므로 렌더링 중에 다음 작업을 해도 된다
+            # 해상도가 모자란 미리보기 이미지는 넘기지 않고 engine 이 원본 경로에서 다시 읽는다
+            layout = self.build_layout(current_mode)
+            images = self.export_images(current_mode, layout)
+            worker = ExportWorker(layout, images, save_path)
+            worker.signals.progress.connect(self.export_progress)
+            worker.signals.finished.connect(lambda path, w=worker: self.export_finished(w, "이미지를 저장했습니다."))
+            worker.signals.failed.connect(
+                lambda message, w=worker: self.export_finished(w, "이미지 저장 중 오류가 발생했습니다: {}".format(message)))
+            worker.signals.cancelled.connect(lambda w=worker: self.export_finished(w, "이미지 저장을 취소했습니다."))
+
+            self.export_workers.append(worker)
+            self.ui.cancel_btn.setEnabled(True)
+            self.export_pool.start(worker)
 
         except Exception as e:
             print(e)
             self.ui.log_label.setText("이미지 저장 중 오류가 발생했습니다.")
 
+    def export_images(self, mode, layout):
+        '''
+        메모리에 있는 슬롯 사진 중 출력에 그대로 쓸 수 있는 사진 목록을 만드는 함수
+        전체 해상도이거나, 크기 제한 모드에서 줄인 사진이 이 출력에 필요한 해상도 이상이면 넘긴다.
+        '''
+        width_px, height_px = engine.output_size(layout)
+        scale_x = width_px / self.width_px
+        scale_y = height_px / self.height_px
+
+        images = []
+        for idx, slot in enumerate(layout["slots"]):
+            cv_img = self.images.peek((mode, idx))
+            orig_size = self.image_sizes[mode][idx]
+            if cv_img is not None and not self.is_full_resolution(mode, idx) and \
+                    (orig_size is None or cv_img.shape[1] < orig_size[0] * engine.slot_sample_factor(slot, scale_x, scale_y)):
+                cv_img = None
+            images.append(cv_img)
+        return images
+
+    def export_progress(self, stage, percent):
+        '''
+        출력 진행 상황을 표시하는 함수
+        '''
+        stage_name = ExportWorker.EXPORT_STAGES.get(stage, stage)
+        waiting = len(self.export_workers) - 1
+        message = "출력 중: {} ({}%)".format(stage_name, percent)
+        if waiting > 0:
+            message += " / 대기 {}건".format(waiting)
+        self.ui.log_label.setText(message)
+
+    def export_finished(self, worker, message):
+        '''
+        출력 작업이 끝났을 때 실행되는 함수
+        '''
+        if worker in self.export_workers:
+            self.export_workers.remove(worker)
+        self.ui.cancel_btn.setEnabled(bool(self.export_workers))
+        self.ui.log_label.setText(message)
+
+    def cancel_export(self):
+        '''
+        진행 중이거나 대기 중인 출력 작업을 모두 취소하는 함수
+        '''
+        for worker in self.export_workers:
+            worker.cancel()
+
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
     win = Program()
@@ -0,0 +1,201 @@
+# _*_ coding: utf-8 _*_
+
+'''
+여러 레이아웃을 프로세스 풀로 한 번에 렌더링하는 배치 모드
+
+매니페스트는 JSONL 파일로, 한 줄에 engine 레이아웃 하나(인화 한 장)를 담는다.
+레이아웃에 "id" 와 "output" 키를 추가로 지정할 수 있으며, 없으면
+줄 번호로 id 를 만들고 출력 폴더에 "<id>.png" 로 저장한다.
+
+작업 결과는 출력 폴더의 batch_status.jsonl 에 한 줄씩 기록되고,
+다시 실행하면 이미 성공한 작업은 건너뛴다.
+작업 프로세스가 비정상 종료되면 (메모리 부족 등) 풀을 새로 만들고, 그때 처리 중이던
+작업을 하나씩 다시 실행하여 다시 죽는 작업만 실패로 기록한 뒤 나머지 작업을 계속한다.
+
+    python batch.py manifest.jsonl output_dir [-j 작업 프로세스 수]
+'''
+
+import sys
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import cv2
+import engine
+
+STATUS_FILE = "batch_status.jsonl"
+
+def resolve_path(base_dir, path):
+    '''
+    매니페스트 기준 상대 경로를 절대 경로로 바꾸는 함수
+    '''
+    if not path or os.path.isabs(path):
+        return path
+    return os.path.normpath(os.path.join(base_dir, path))
+
+def read_manifest(manifest_path, output_dir):
+    '''
+    매니페스트를 읽어 (id, 출력 경로, 레이아웃) 목록을 만드는 함수
+    '''
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    seen = set()
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            layout = json.loads(line)
+            job_id = str(layout.pop("id", "{:05d}".format(line_no)))
+            if job_id in seen:
+                raise ValueError("중복된 작업 id 입니다: {}".format(job_id))
+            seen.add(job_id)
+
+            output = layout.pop("output", None) or job_id + ".png"
+            output = os.path.join(output_dir, output)
+
+            layout["frame_path"] = resolve_path(base_dir, layout.get("frame_path"))
+            layout["font_path"] = resolve_path(base_dir, layout.get("font_path"))
+            for slot in layout.get("slots", []):
+                slot["image_path"] = resolve_path(base_dir, slot.get("image_path"))
+
+            jobs.append((job_id, output, layout))
+    return jobs
+
+def read_status(output_dir):
+    '''
+    이전 실행에서 성공한 작업 id 목록을 읽는 함수
+    '''
+    done = set()
+    status_path = os.path.join(output_dir, STATUS_FILE)
+    if not os.path.exists(status_path):
+        return done
+
+    with open(status_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 중간에 끊긴 마지막 줄은 무시
+            if record.get("ok") and os.path.exists(record.get("output", "")):
+                done.add(record["id"])
+    return done
+
+def init_worker():
+    '''
+    작업 프로세스 초기화 함수
+    프로세스끼리 코어를 나눠 쓰므로 OpenCV 내부 스레드는 끈다.
+    '''
+    cv2.setNumThreads(1)
+
+def run_job(job_id, output, layout):
+    '''
+    작업 하나를 렌더링하고 결과를 dict 로 반환하는 함수
+    '''
+    start = time.perf_counter()
+    try:
+        result_image = engine.render_layout(layout, workers=1)  # 작업 프로세스끼리 병렬 처리
+
+        # 중간에 중단되어도 깨진 파일이 남지 않도록 임시 파일에 쓴 뒤 교체
+        directory, name = os.path.split(output)
+        os.makedirs(directory or ".", exist_ok=True)
+        temp_path = os.path.join(directory, ".part-" + name)
+        if not engine.write_image(temp_path, result_image):
+            raise ValueError("이미지 인코딩에 실패했습니다: {}".format(output))
+        os.replace(temp_path, output)
+
+        return {"id": job_id, "output": output, "ok": True,
+                "seconds": round(time.perf_counter() - start, 3)}
+    except Exception as e:
+        return {"id": job_id, "output": output, "ok": False,
+                "error": "{}: {}".format(type(e).__name__, e),
+                "seconds": round(time.perf_counter() - start, 3)}
+
+def run_pool(queue, workers, finish):
+    '''
+    queue 의 작업을 프로세스 풀로 렌더링하고 결과마다 finish(record) 를 호출하는 함수
+    어느 작업이 프로세스를 죽였는지 좁힐 수 있도록 한 번에 workers 개까지만 넘긴다.
+    풀이 깨지면 그때 처리 중이던 작업 목록을 반환하고, queue 에는 남은 작업이 그대로 남는다.
+    '''
+    running = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        while queue or running:
+            while queue and len(running) < workers:
+                job = queue.pop(0)
+                running[executor.submit(run_job, *job)] = job
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                try:
+                    record = future.result()
+                except BrokenProcessPool:
+                    return list(running.values())
+                del running[future]
+                finish(record)
+    return []
+
+def run_batch(manifest_path, output_dir, workers=None, resume=True, log=print):
+    '''
+    매니페스트의 모든 작업을 프로세스 풀로 렌더링하는 함수
+    결과는 매니페스트 순서대로 정렬된 목록으로 반환한다.
+    '''
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = read_manifest(manifest_path, output_dir)
+    done = read_status(output_dir) if resume else set()
+    pending = [job for job in jobs if job[0] not in done]
+    workers = workers or os.cpu_count() or 1
+
+    log("총 {}건 중 {}건 완료됨, {}건 렌더링".format(len(jobs), len(jobs) - len(pending), len(pending)))
+
+    results = {}
+    status_path = os.path.join(output_dir, STATUS_FILE)
+    with open(status_path, 'a', encoding='utf-8') as status:
+        def finish(record):
+            results[record["id"]] = record
+
+            # 재시작 시 이어서 할 수 있도록 완료 즉시 기록
+            status.write(json.dumps(record, ensure_ascii=False) + "\n")
+            status.flush()
+
+            if record["ok"]:
+                log("[OK] {} ({}s) -> {}".format(record["id"], record["seconds"], record["output"]))
+            else:
+                log("[FAIL] {} {}".format(record["id"], record["error"]))
+
+        queue = list(pending)
+        suspects = []
+        while queue or suspects:
+            if not suspects:
+                suspects = run_pool(queue, workers, finish)
+                if suspects:
+                    log("작업 프로세스가 비정상 종료되어 풀을 다시 만듭니다. ({}건 다시 실행)".format(len(suspects)))
+                continue
+
+            # 어느 작업이 죽었는지 알 수 없으므로 하나씩 따로 다시 실행
+            job_id, output, _ = job = suspects.pop(0)
+            start = time.perf_counter()
+            if run_pool([job], 1, finish):
+                finish({"id": job_id, "output": output, "ok": False,
+                        "error": "BrokenProcessPool: 작업 프로세스가 비정상 종료되었습니다.",
+                        "seconds": round(time.perf_counter() - start, 3)})
+
+    return [results[job[0]] for job in pending]
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="레이아웃 매니페스트 일괄 렌더링")
+    parser.add_argument("manifest", help="JSONL 매니페스트 경로")
+    parser.add_argument("output_dir", help="출력 폴더")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="작업 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--no-resume", action="store_true", help="이전 실행 결과를 무시하고 모두 다시 렌더링")
+    args = parser.parse_args(argv[1:])
+
+    results = run_batch(args.manifest, args.output_dir, args.jobs, not args.no_resume)
+    failed = [record for record in results if not record["ok"]]
+    print("성공 {}건, 실패 {}건".format(len(results) - len(failed), len(failed)))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
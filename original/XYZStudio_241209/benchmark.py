@@ -0,0 +1,414 @@
+# _*_ coding: utf-8 _*_
+
+'''
+미리보기/출력 주요 경로 벤치마크
+
+합성 사진(JPEG)과 프레임(PNG, 알파 채널 구멍)을 임시 폴더에 만들고
+2/4/6/9 장, 가로/세로 8가지 프레임 모드마다 다음을 측정하여 JSON 으로 저장한다.
+
+    preview_drag     드래그 한 걸음 (INTER_LINEAR, preview.draw_slot)
+    preview_settle   드래그를 멈춘 뒤 고화질 다시 그리기 (INTER_LANCZOS4)
+    preview_zoom     휠 한 칸 (스케일 변경)
+    cv_to_pixmap     라벨 버퍼 QImage -> QPixmap 변환 (PySide2 가 있을 때만)
+    frame_load       select_frame 의 프레임 디코딩+리사이즈 (캐시 없음 / 디스크 캐시 / 메모리 캐시)
+    export_*         engine.render_layout 단계별 (slots, frame=프레임 디코딩+리사이즈, blend=알파 블렌딩, text)
+                     와 encode(PNG)
+
+시간은 반복 측정의 중앙값/최솟값(ms), 메모리는 tracemalloc 으로 잰 출력 한 번의 최대 할당량(MB)이다.
+출력은 프레임 캐시 없이 매번 프레임 디코딩+리사이즈부터 측정한다.
+버전 간 회귀를 비교할 수 있도록 환경 정보와 설정을 함께 기록한다.
+
+    python benchmark.py [-o benchmark.json] [--profile 15x10_1200] [--repeat 3] [--modes 3 4]
+'''
+
+import sys
+import os
+import gc
+import json
+import time
+import shutil
+import subprocess
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import statistics
+import cv2
+import numpy as np
+import engine
+import preview
+import profiles
+from frame_cache import FrameCache
+
+# 모드 번호: (사진 장 수, 세로 여부, 열 수)
+MODES = {
+    1: (2, False, 2), 2: (2, True, 1),
+    3: (4, False, 2), 4: (4, True, 2),
+    5: (6, False, 3), 6: (6, True, 2),
+    7: (9, False, 3), 8: (9, True, 3)
+}
+PREVIEW_LONG, PREVIEW_SHORT = 719, 483
+DRAG_STEPS = 60
+ZOOM_STEPS = 20
+
+qt_app = None
+
+def mode_name(mode):
+    count, vertical, _ = MODES[mode]
+    return "{}_{}".format(count, "vertical" if vertical else "horizontal")
+
+def make_photo(path, width, height, seed):
+    '''
+    부드러운 무늬의 합성 사진을 JPEG 로 저장하는 함수 (랜덤 잡음보다 실제 사진에 가까운 압축률)
+    '''
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (max(1, height // 32), max(1, width // 32), 3), dtype=np.uint8)
+    photo = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    cv2.imwrite(path, photo, [cv2.IMWRITE_JPEG_QUALITY, 92])
+
+def slot_rects(mode):
+    '''
+    미리보기 좌표의 슬롯 라벨과 문구 라벨 위치를 격자로 만드는 함수
+    가로 프레임은 오른쪽, 세로 프레임은 아래쪽에 문구 영역을 둔다.
+    '''
+    count, vertical, columns = MODES[mode]
+    rows = (count + columns - 1) // columns
+    if vertical:
+        width, height = PREVIEW_SHORT, PREVIEW_LONG
+        area = (10, 10, width - 20, int(height * 0.8) - 20)
+        texts = [[20, int(height * 0.8), width - 40, int(height * 0.15)]]
+    else:
+        width, height = PREVIEW_LONG, PREVIEW_SHORT
+        area = (10, 10, int(width * 0.75) - 20, height - 20)
+        text_left = int(width * 0.75)
+        texts = [[text_left + 10 + 60 * i, 20, 50, height - 40] for i in range(3)]
+
+    cell_width = area[2] // columns
+    cell_height = area[3] // rows
+    slots = []
+    for index in range(count):
+        row, column = divmod(index, columns)
+        slots.append([area[0] + column * cell_width + 5, area[1] + row * cell_height + 5,
+                      cell_width - 10, cell_height - 10])
+    return (width, height), slots, texts
+
+def make_frame(path, mode, frame_size):
+    '''
+    슬롯 자리가 투명하고 가장자리에 그라데이션이 있는 프레임 PNG 를 저장하는 함수
+    '''
+    preview_size, slots, _ = slot_rects(mode)
+    width, height = frame_size
+    if MODES[mode][1]:
+        width, height = height, width
+    frame = np.zeros((height, width, 4), dtype=np.uint8)
+    frame[..., :3] = (40, 110, 190)
+    frame[..., 3] = 255
+
+    sx = width / preview_size[0]
+    sy = height / preview_size[1]
+    for x, y, w, h in slots:
+        x1, y1, x2, y2 = int(x * sx), int(y * sy), int((x + w) * sx), int((y + h) * sy)
+        frame[y1:y2, x1:x2, 3] = 0
+        ramp = np.linspace(0, 255, max(1, (x2 - x1) // 8)).astype(np.uint8)
+        frame[y1:y2, x1:x1 + len(ramp), 3] = ramp[None, :]
+    cv2.imwrite(path, frame)
+
+def make_layout(mode, frame_path, photo_paths, font_path):
+    preview_size, slots, texts = slot_rects(mode)
+    layout = {
+        "frame_path": frame_path,
+        "preview_size": list(preview_size),
+        "screen_dpi": 96,
+        "font_path": font_path,
+        "slots": [],
+        "texts": []
+    }
+    for index, rect in enumerate(slots):
+        layout["slots"].append({
+            "rect": rect,
+            "image_path": photo_paths[index % len(photo_paths)],
+            "scale": "{:.1f}".format(8 + 3 * index),  # 슬롯마다 다른 확대 배율
+            "moved": [-5 * index, -3 * index]
+        })
+    if font_path:
+        if MODES[mode][1]:
+            layout["texts"].append({"rect": texts[0], "text": "XYZ Studio\n2024.12.09", "font_size": 14})
+        else:
+            for index, rect in enumerate(texts):
+                layout["texts"].append({"rect": rect, "text": "\n".join("XYZ STUDIO"[index::3]), "font_size": 12})
+    return layout
+
+def summarize(samples):
+    '''
+    초 단위 측정값 목록을 ms 통계로 만드는 함수
+    '''
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+        "runs": len(samples)
+    }
+
+def measure_peak(func):
+    '''
+    func 실행 중 tracemalloc 최대 할당량(MB)을 반환하는 함수
+    '''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+    finally:
+        tracemalloc.stop()
+
+def bench_preview(mode, photo_path, repeat):
+    '''
+    첫 번째 슬롯 라벨에서 드래그/휠 한 걸음마다 다시 그리는 시간을 재는 함수
+    '''
+    _, slots, _ = slot_rects(mode)
+    label_width, label_height = slots[0][2], slots[0][3]
+    source_img, orig_size = preview.load_preview_image(photo_path, (label_width, label_height))
+    canvas = engine.create_canvas(label_width, label_height)
+    cache = preview.PreviewCache()
+
+    fit = min(label_width / orig_size[0], label_height / orig_size[1]) * 100
+    scale = "{:.1f}".format(fit * 1.5)
+    size = (int(orig_size[0] * fit * 0.015), int(orig_size[1] * fit * 0.015))
+    source = cache.source((mode, 0), source_img, size)
+
+    results = {}
+    for name, interpolation in (("preview_drag", cv2.INTER_LINEAR), ("preview_settle", cv2.INTER_LANCZOS4)):
+        samples = []
+        region = (0, 0, 0, 0)
+        for _ in range(repeat):
+            for step in range(DRAG_STEPS):
+                moved = (-(step % 30) * 3, -(step % 20) * 2)
+                start = time.perf_counter()
+                region = preview.draw_slot(canvas, region, source, scale, moved, orig_size, interpolation)
+                samples.append(time.perf_counter() - start)
+        results[name] = summarize(samples)
+
+    samples = []
+    region = (0, 0, 0, 0)
+    for _ in range(repeat):
+        for step in range(ZOOM_STEPS):
+            zoom = fit + step
+            size = (max(1, int(orig_size[0] * zoom * 0.01)), max(1, int(orig_size[1] * zoom * 0.01)))
+            start = time.perf_counter()
+            source = cache.source((mode, 0), source_img, size)
+            region = preview.draw_slot(canvas, region, source, "{:.1f}".format(zoom), None, orig_size,
+                                       cv2.INTER_LINEAR)
+            samples.append(time.perf_counter() - start)
+    results["preview_zoom"] = summarize(samples)
+    return results, canvas
+
+def bench_pixmap(canvas, repeat, qt):
+    '''
+    basic.Program 의 라벨 버퍼와 같은 방식으로 QImage 를 감싸 QPixmap 으로 바꾸는 시간을 재는 함수
+    '''
+    if qt is None:
+        return {"skipped": "PySide2 를 불러올 수 없습니다."}
+    QtGui = qt
+    height, width = canvas.shape[:2]
+    qimage = QtGui.QImage(canvas.data, width, height, canvas.strides[0], QtGui.QImage.Format_BGR888)
+    pixmap = QtGui.QPixmap(width, height)
+    samples = []
+    for _ in range(repeat * DRAG_STEPS):
+        start = time.perf_counter()
+        pixmap.convertFromImage(qimage)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def bench_frame(frame_path, preview_size, repeat, cache_dir):
+    '''
+    select_frame 의 프레임 디코딩+리사이즈를 캐시 상태별로 재는 함수
+    '''
+    results = {}
+    samples = []
+    for _ in range(repeat):
+        cache = FrameCache(disk_dir=None, reader=engine.read_image)
+        start = time.perf_counter()
+        cache.get(frame_path, preview_size)
+        samples.append(time.perf_counter() - start)
+    results["cold"] = summarize(samples)
+
+    FrameCache(disk_dir=cache_dir, reader=engine.read_image).get(frame_path, preview_size)
+    samples = []
+    for _ in range(repeat):
+        cache = FrameCache(disk_dir=cache_dir, reader=engine.read_image)
+        start = time.perf_counter()
+        cache.get(frame_path, preview_size)
+        samples.append(time.perf_counter() - start)
+    results["disk"] = summarize(samples)
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cache.get(frame_path, preview_size)
+        samples.append(time.perf_counter() - start)
+    results["memory"] = summarize(samples)
+    return results
+
+def run_export(layout, output_path):
+    '''
+    출력 한 번을 실행하고 단계별 소요 시간(초)을 반환하는 함수
+    render_layout 의 진행 상황 콜백이 단계가 바뀔 때마다 호출되는 것을 이용하고,
+    frame 단계 안의 알파 블렌딩은 engine.blend_frame 을 감싸서 blend 단계로 따로 잰다.
+    (text 단계의 문구 레이어 합성도 blend_frame 을 쓰므로 frame 단계 안의 호출만 센다)
+    '''
+    times = {}
+    current = {"stage": None, "start": time.perf_counter()}
+    blend_seconds = []
+    blend_frame = engine.blend_frame
+
+    def timed_blend_frame(*args, **kwargs):
+        if current["stage"] != "frame":
+            return blend_frame(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return blend_frame(*args, **kwargs)
+        finally:
+            blend_seconds.append(time.perf_counter() - start)
+
+    def progress(stage, percent):
+        if stage == current["stage"]:
+            return
+        now = time.perf_counter()
+        if current["stage"] is not None:
+            times[current["stage"]] = now - current["start"]
+        current["stage"], current["start"] = stage, now
+
+    engine.blend_frame = timed_blend_frame
+    try:
+        result_image = engine.render_layout(layout, progress=progress)
+    finally:
+        engine.blend_frame = blend_frame
+    progress("encode", 85)
+    engine.write_image(output_path, result_image)
+    progress(None, 100)
+
+    times["blend"] = sum(blend_seconds)
+    if "frame" in times:
+        times["frame"] -= times["blend"]
+    return times
+
+def bench_export(layout, output_path, repeat):
+    '''
+    출력 단계별 시간과 메모리를 재는 함수
+    메모리는 tracemalloc 이 시간 측정에 영향을 주지 않도록 따로 한 번 실행한다.
+    '''
+    # 프레임 캐시가 결과를 왜곡하지 않도록 매번 비운다 (디스크 캐시는 main 에서 끈다)
+    stage_samples = {}
+    for _ in range(repeat):
+        engine.frame_cache.clear()
+        for stage, seconds in run_export(layout, output_path).items():
+            stage_samples.setdefault(stage, []).append(seconds)
+
+    results = {"export_" + stage: summarize(samples) for stage, samples in stage_samples.items()}
+    totals = [sum(values) for values in zip(*stage_samples.values())]
+    results["export_total"] = summarize(totals)
+
+    engine.frame_cache.clear()
+    results["export_total"]["peak_mb"] = measure_peak(lambda: run_export(layout, output_path))
+    return results
+
+def environment():
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "opencv_threads": cv2.getNumThreads()
+    }
+    try:
+        info["revision"] = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=engine.PWD, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+def load_qt():
+    '''
+    PySide2 가 있으면 화면 없이 QGuiApplication 을 만들고 QtGui 모듈을 반환하는 함수
+    '''
+    global qt_app
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PySide2 import QtGui
+    except ImportError:
+        return None
+    if QtGui.QGuiApplication.instance() is None:
+        qt_app = QtGui.QGuiApplication([])
+    return QtGui
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="미리보기/출력 벤치마크")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="결과 JSON 경로")
+    parser.add_argument("--profile", default="15x10_1200", help="출력 프로파일 (기본: 15x10_1200)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수")
+    parser.add_argument("--modes", type=int, nargs="*", default=sorted(MODES), help="측정할 프레임 모드 번호 (1-8)")
+    parser.add_argument("--photo-size", type=int, nargs=2, default=[6000, 4000], metavar=("W", "H"),
+                        help="합성 사진 크기 (기본: 24MP)")
+    parser.add_argument("--frame-size", type=int, nargs=2, default=[3543, 2362], metavar=("W", "H"),
+                        help="가로 프레임 PNG 크기 (기본: 15x10cm 600DPI)")
+    parser.add_argument("--font", default=None, help="문구 폰트 경로 (기본: 프로그램 폴더의 font.ttf)")
+    parser.add_argument("--keep", action="store_true", help="합성 데이터 폴더를 지우지 않음")
+    args = parser.parse_args(argv[1:])
+
+    font_path = args.font or engine.font_path_of({})
+    if not os.path.exists(font_path):
+        print("폰트가 없어 문구 단계는 측정하지 않습니다: {}".format(font_path))
+        font_path = None
+
+    qt = load_qt()
+    engine.frame_cache.disk_dir = None  # 출력은 매번 프레임 디코딩+리사이즈부터 측정
+    work_dir = tempfile.mkdtemp(prefix="xyzstudio_bench_")
+    try:
+        photo_paths = []
+        for index in range(3):
+            path = os.path.join(work_dir, "photo{}.jpg".format(index))
+            make_photo(path, args.photo_size[0], args.photo_size[1], index)
+            photo_paths.append(path)
+
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": environment(),
+            "config": {
+                "profile": args.profile,
+                "repeat": args.repeat,
+                "photo_size": args.photo_size,
+                "frame_size": args.frame_size,
+                "text": font_path is not None
+            },
+            "modes": {}
+        }
+
+        for mode in args.modes:
+            name = mode_name(mode)
+            frame_path = os.path.join(work_dir, "{}.png".format(name))
+            make_frame(frame_path, mode, args.frame_size)
+            layout = profiles.apply_profile(make_layout(mode, frame_path, photo_paths, font_path), args.profile)
+            preview_size = tuple(layout["preview_size"])
+
+            results, canvas = bench_preview(mode, photo_paths[0], args.repeat)
+            results["cv_to_pixmap"] = bench_pixmap(canvas, args.repeat, qt)
+            results["frame_load"] = bench_frame(frame_path, preview_size, args.repeat,
+                                                os.path.join(work_dir, "frame_cache"))
+            results.update(bench_export(layout, os.path.join(work_dir, name + "_out.png"), args.repeat))
+            report["modes"][name] = results
+
+            print("{:<14} drag {:>7.2f}ms  export {:>8.1f}ms  peak {:>7.1f}MB".format(
+                name, results["preview_drag"]["median_ms"], results["export_total"]["median_ms"],
+                results["export_total"]["peak_mb"]))
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print("결과를 저장했습니다: {}".format(args.output))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
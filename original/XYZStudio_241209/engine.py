@@ -0,0 +1,764 @@
+# _*_ coding: utf-8 _*_
+
+'''
+Qt 없이 동작하는 출력(export) 렌더링 엔진
+
+Program.export_image 의 합성 과정을 위젯과 분리한 모듈이다.
+레이아웃은 JSON 으로 직렬화 가능한 dict 이며 다음 키를 가진다.
+
+    frame_path      프레임 이미지 경로
+    print_size_cm   출력 크기 [가로, 세로] (cm)
+    dpi             출력 DPI
+    color_format    "color" 또는 "gray" (기본 "color")
+    profile         print_size_cm 이 없을 때 사용할 출력 프로파일 이름 (profiles.py)
+    preview_size    미리보기 프레임 크기 [가로, 세로] (px)
+    screen_dpi      미리보기 화면의 논리 DPI (폰트 크기 계산용)
+    font_path       문구에 사용할 폰트 경로
+    slots           [{"rect": [x, y, w, h], "image_path": ..., "scale": ..., "moved": [dx, dy] 또는 None,
+                      "orig_size": [w, h] (선택, 원본 크기)}]
+    texts           [{"rect": [x, y, w, h], "text": ..., "font_size": ...}]
+
+rect 와 moved 는 모두 미리보기 좌표(px)이다.
+QApplication 이나 디스플레이 없이 CLI 와 작업 프로세스에서 호출할 수 있다.
+
+    python engine.py layout.json output.png [--trace trace.jsonl] [--profile 폴더]
+'''
+
+import sys
+import os
+import json
+import math
+import mmap
+import argparse
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import cv2
+import numpy as np
+from PIL import ImageFont, ImageDraw, Image
+from frame_cache import FrameCache, DEFAULT_DISK_DIR
+from instrument import tracer, array_info
+import instrument
+import profiles
+
+PWD = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_DPI = 1200
+SHEAR_FACTOR = 0.3
+BLEND_ROWS = 256
+# 한 장을 출력할 때 슬롯을 동시에 그릴 스레드 수 (0: CPU 코어 수)
+SLOT_WORKERS = int(os.environ.get("XYZ_SLOT_WORKERS", "0") or 0)
+LANCZOS_SUPPORT = 4  # INTER_LANCZOS4 가 참조하는 한쪽 이웃 픽셀 수
+# 원본 크기 제한 모드: 사진을 출력에 필요한 해상도까지만 줄여서 디코딩/보관한다 (XYZ_CAP_ORIGINALS=1)
+CAP_ORIGINALS = os.environ.get("XYZ_CAP_ORIGINALS") == "1"
+# 크기 제한 모드에서 미리보기 사진을 지금 스케일의 몇 배까지 다시 디코딩 없이 확대할 수 있게 보관할지
+CAP_HEADROOM = 2.0
+
+REDUCED_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+# FreeTypeFont 는 스레드 안전하지 않으므로 캐시된 폰트 객체로 측정/그리기할 때 잡는다
+font_lock = threading.Lock()
+
+class RenderCancelled(Exception):
+    '''
+    진행 상황 콜백에서 렌더링을 중단할 때 사용하는 예외
+    '''
+
+def read_image(path, flags=cv2.IMREAD_COLOR):
+    '''
+    경로의 이미지를 OpenCV 로 디코딩하는 함수 (한글 경로 지원)
+    파일을 메모리 매핑하여 중간 바이트 복사 없이 디코더에 넘긴다.
+    '''
+    with open(path, 'rb') as stream:
+        if os.fstat(stream.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            data = np.frombuffer(mapped, dtype=np.uint8)
+            image = cv2.imdecode(data, flags)
+            del data  # 매핑을 닫기 전에 버퍼 참조 해제
+    return image
+
+def image_size(path):
+    '''
+    디코딩하지 않고 헤더만 읽어 EXIF 회전을 반영한 원본 크기 (가로, 세로)를 반환하는 함수
+    '''
+    with Image.open(path) as img:
+        width, height = img.size
+        orientation = img.getexif().get(0x0112, 1)
+    if orientation in (5, 6, 7, 8):  # 90도 회전
+        width, height = height, width
+    return width, height
+
+def read_capped_image(path, factor):
+    '''
+    원본을 factor 배 크기로 줄여 디코딩하고 (이미지, 원본 크기)를 반환하는 함수 (factor >= 1 이면 원본 그대로)
+    JPEG 는 목표 크기보다 작아지지 않는 가장 큰 비율로 DCT 축소 디코딩한 뒤
+    INTER_AREA 로 정확히 목표 크기까지 줄인다.
+    '''
+    try:
+        width, height = image_size(path)
+    except (OSError, ValueError):
+        width, height = None, None
+
+    if width is None or factor >= 1:
+        image = read_image(path)
+        if image is None:
+            return None, None
+        return image, (image.shape[1], image.shape[0])
+
+    target = (max(1, math.ceil(width * factor)), max(1, math.ceil(height * factor)))
+    reduce = 1
+    for candidate in (8, 4, 2):
+        if width // candidate >= target[0] and height // candidate >= target[1]:
+            reduce = candidate
+            break
+
+    image = read_image(path, REDUCED_FLAGS.get(reduce, cv2.IMREAD_COLOR))
+    if image is None:
+        return None, None
+    if image.shape[1] > target[0] and image.shape[0] > target[1]:
+        image = cv2.resize(image, target, interpolation=cv2.INTER_AREA)
+    return image, (width, height)
+
+# 미리보기와 출력이 함께 쓰는 프레임 템플릿 캐시
+# XYZ_FRAME_CACHE_DIR 을 빈 문자열로 지정하면 디스크 캐시를 쓰지 않는다.
+frame_cache = FrameCache(disk_dir=os.environ.get("XYZ_FRAME_CACHE_DIR", DEFAULT_DISK_DIR), reader=read_image)
+
+def write_image(path, image):
+    '''
+    이미지를 확장자에 맞게 인코딩하여 저장하는 함수 (한글 경로 지원)
+    '''
+    file_type = os.path.splitext(path)[1]
+    with tracer.stage("encode", format=file_type, image=array_info(image)) as info:
+        ret, img_arr = cv2.imencode(file_type, image)
+        info["encoded_bytes"] = int(img_arr.nbytes) if ret else 0
+    if ret:
+        with tracer.stage("write", path=path):
+            with open(path, mode='w+b') as f:
+                img_arr.tofile(f)
+    return ret
+
+def load_layout(path):
+    '''
+    JSON 레이아웃 파일을 읽는 함수
+    '''
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_layout(path, layout):
+    '''
+    레이아웃을 JSON 파일로 저장하는 함수
+    '''
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(layout, f, ensure_ascii=False, indent=2)
+
+def create_canvas(width, height):
+    '''
+    흰색 배경의 캔버스를 생성하는 함수
+    '''
+    canvas = np.zeros((height, width, 3), dtype=np.uint8)
+    canvas.fill(255)  # 흰색 배경
+    return canvas
+
+def is_horizontal(layout):
+    '''
+    레이아웃이 가로 방향인지 확인하는 함수
+    '''
+    preview_width, preview_height = layout["preview_size"]
+    return preview_width > preview_height
+
+def resolve_profile(layout):
+    '''
+    출력 크기가 지정되지 않은 레이아웃에 출력 프로파일을 적용하는 함수
+    '''
+    if "print_size_cm" in layout:
+        return layout
+    return profiles.apply_profile(layout, layout.get("profile", profiles.DEFAULT_PROFILE))
+
+def output_size(layout):
+    '''
+    출력 이미지의 픽셀 크기 (가로, 세로)를 계산하는 함수
+    '''
+    return profiles.pixel_size(layout["print_size_cm"], layout.get("dpi", DEFAULT_DPI))
+
+def apply_color_format(layout, image):
+    '''
+    레이아웃의 색상 형식으로 결과 이미지를 변환하는 함수
+    '''
+    if layout.get("color_format") == "gray":
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+def output_font_size(layout, orig_font_size):
+    '''
+    미리보기 폰트 크기를 출력 해상도의 폰트 크기로 변환하는 함수
+    '''
+    target_dpi = layout.get("dpi", DEFAULT_DPI)
+
+    # DPI 기반 스케일링 계산
+    dpi_scale = layout.get("screen_dpi", 96.0) / 96.0
+
+    # 실제 보이는 폰트 크기 계산 (DPI 스케일링 고려)
+    actual_font_size = int(orig_font_size * dpi_scale)
+
+    # 출력용 폰트 크기 계산 (실제 보이는 크기 기준)
+    return int(actual_font_size * (target_dpi / 96.0))
+
+def font_path_of(layout):
+    '''
+    레이아웃에 사용할 폰트 경로를 반환하는 함수
+    '''
+    return layout.get("font_path") or os.path.join(PWD, "font.ttf")
+
+@lru_cache(maxsize=32)
+def load_font(font_path, font_size):
+    '''
+    크기별 TrueType 폰트를 한 번만 읽도록 캐시하는 함수
+    '''
+    return ImageFont.truetype(font_path, font_size)
+
+@lru_cache(maxsize=4096)
+def sheared_glyph(font_path, font_size, char, shear_factor=SHEAR_FACTOR):
+    '''
+    기울임 변환까지 끝난 문자 하나의 RGBA 이미지와 문자 너비를 반환하는 함수
+    (폰트, 크기, 문자, 기울기) 별로 캐시되므로 반환된 이미지는 수정하지 않는다.
+    '''
+    font = load_font(font_path, font_size)
+
+    with font_lock:
+        # 현재 문자의 크기 계산
+        bbox = font.getbbox(char)
+        char_width = bbox[2] - bbox[0]
+
+        # 문자 그리기 (기울임 효과 적용)
+        padding = int(font_size * 0.3)
+        temp_img = Image.new('RGBA',
+                             (int(char_width * 2), int(font_size * 1.5)),  # 임시 이미지 크기 조정
+                             (255, 255, 255, 0))
+        temp_draw = ImageDraw.Draw(temp_img)
+
+        # 임시 이미지에 문자 그리기
+        temp_draw.text((padding, padding/2), char, font=font, fill=(0, 0, 0))
+
+    # 기울임 변환 행렬 (shear transform)
+    temp_img = temp_img.transform(
+        temp_img.size,
+        Image.AFFINE,
+        (1, shear_factor, 0, 0, 1, 0),
+        Image.BICUBIC
+    )
+    return temp_img, char_width
+
+def slot_matrix(slot, image_size, scale_x, scale_y, orig_size=None):
+    '''
+    슬롯 이미지의 원본 픽셀 좌표를 출력 픽셀 좌표로 옮기는 2x3 변환 행렬을 계산하는 함수
+
+    배율은 반올림하지 않은 실수로 계산하고, 위치는 slot_region 의 라벨 경계와 같이
+    정수 픽셀로 버림하여 이미지가 라벨 첫 줄/첫 열부터 채워지도록 한다.
+    image_size 가 축소 디코딩한 이미지 크기 (가로, 세로)이면 orig_size 에 원본 크기를 넘긴다.
+    '''
+    image_width, image_height = image_size
+    orig_width, orig_height = orig_size or image_size
+
+    # 스케일은 원본 크기 기준
+    scale_ratio = float(slot["scale"]) * 0.01
+    kx = scale_ratio * scale_x * orig_width / image_width
+    ky = scale_ratio * scale_y * orig_height / image_height
+
+    # 라벨 위치 + 이동값 (slot_region 과 같은 반올림)
+    pos_x, pos_y = slot["rect"][:2]
+    diff_x, diff_y = slot.get("moved") or (0, 0)
+    tx = int(pos_x * scale_x) + int(diff_x * scale_x)
+    ty = int(pos_y * scale_y) + int(diff_y * scale_y)
+
+    # cv2.resize 와 같은 픽셀 중심 정렬: (출력 x + 0.5) = (원본 x + 0.5) * k + t
+    return np.float64([
+        [kx, 0, tx + 0.5 * kx - 0.5],
+        [0, ky, ty + 0.5 * ky - 0.5]
+    ])
+
+def slot_region(slot, image_size, matrix, scale_x, scale_y):
+    '''
+    라벨 안에서 슬롯 이미지가 실제로 보이는 출력 영역 (x1, y1, x2, y2) 을 반환하는 함수
+    픽셀 중심이 이미지 안에 들어가는 픽셀만 포함한다.
+    '''
+    # 라벨의 경계 계산 (스케일 적용)
+    pos_x, pos_y, label_width, label_height = slot["rect"]
+    target_x = int(pos_x * scale_x)
+    target_y = int(pos_y * scale_y)
+    label_right = target_x + int(label_width * scale_x)
+    label_bottom = target_y + int(label_height * scale_y)
+
+    # 이미지 네 모서리의 출력 좌표 (픽셀 경계 기준)
+    image_width, image_height = image_size
+    linear = matrix[:, :2]
+    offset = matrix[:, 2] + 0.5 - linear.dot([0.5, 0.5])
+    corners = np.float64([[0, 0], [image_width, 0], [0, image_height], [image_width, image_height]])
+    points = corners.dot(linear.T) + offset
+
+    x1 = max(target_x, int(math.ceil(points[:, 0].min() - 0.5)))
+    y1 = max(target_y, int(math.ceil(points[:, 1].min() - 0.5)))
+    x2 = min(label_right, int(math.ceil(points[:, 0].max() - 0.5)))
+    y2 = min(label_bottom, int(math.ceil(points[:, 1].max() - 0.5)))
+    return x1, y1, x2, y2
+
+def warp_region(src, dst, scale_x, scale_y, origin_x, origin_y, region):
+    '''
+    src 를 (scale_x, scale_y) 배율로 리사이즈해 (origin_x, origin_y) 에 둔 이미지 중
+    region (x1, y1, x2, y2) 부분만 계산하여 dst 에 쓰는 함수
+    cv2.resize 와 같은 픽셀 중심 정렬을 사용한다.
+    '''
+    x1, y1, x2, y2 = region
+    inv_x = 1.0 / scale_x
+    inv_y = 1.0 / scale_y
+
+    # 출력 좌표 -> 원본 좌표 역변환 행렬
+    matrix = np.float64([
+        [inv_x, 0, (x1 - origin_x + 0.5) * inv_x - 0.5],
+        [0, inv_y, (y1 - origin_y + 0.5) * inv_y - 0.5]
+    ])
+    cv2.warpAffine(src, matrix, (x2 - x1, y2 - y1), dst=dst,
+                   flags=cv2.INTER_LANCZOS4 | cv2.WARP_INVERSE_MAP,
+                   borderMode=cv2.BORDER_REPLICATE)
+
+def source_roi(cv_img, inverse, region, pad=LANCZOS_SUPPORT):
+    '''
+    출력 영역 region 을 계산하는 데 필요한 원본 영역 (sx1, sy1, sx2, sy2) 을 반환하는 함수
+    inverse 는 출력 좌표 -> 원본 좌표 변환 행렬이다.
+    보간 필터가 참조하는 이웃 픽셀까지 pad 만큼 포함하고, warpAffine 이 좌표를
+    1/32 픽셀 단위로 반올림하는 만큼 양쪽에 한 픽셀씩 여유를 둔다.
+    '''
+    x1, y1, x2, y2 = region
+    src_height, src_width = cv_img.shape[:2]
+
+    # 영역 양 끝 픽셀 중심의 원본 좌표
+    corners = np.float64([[x1, y1], [x2 - 1, y1], [x1, y2 - 1], [x2 - 1, y2 - 1]])
+    points = corners.dot(inverse[:, :2].T) + inverse[:, 2]
+
+    sx1 = max(0, int(math.floor(points[:, 0].min())) - pad)
+    sy1 = max(0, int(math.floor(points[:, 1].min())) - pad)
+    sx2 = min(src_width, int(math.floor(points[:, 0].max())) + pad + 2)
+    sy2 = min(src_height, int(math.floor(points[:, 1].max())) + pad + 2)
+    return sx1, sy1, max(sx1 + 1, sx2), max(sy1 + 1, sy2)
+
+def warp_slot(cv_img, dst, matrix, region, interpolation=cv2.INTER_LANCZOS4):
+    '''
+    변환 행렬 matrix 를 적용한 슬롯 이미지 중 region 에 보이는 부분만 dst 에 쓰는 함수
+    원본에서 필요한 영역만 잘라 한 번의 warpAffine 으로 리샘플링하므로 시간과 메모리가
+    확대 배율이 아니라 region 크기에 비례한다.
+    '''
+    x1, y1, x2, y2 = region
+    inverse = cv2.invertAffineTransform(matrix)
+    sx1, sy1, sx2, sy2 = source_roi(cv_img, inverse, region)
+
+    # region 의 (0, 0) 과 잘라낸 영역의 (0, 0) 을 기준으로 옮긴 역변환
+    inverse[:, 2] += inverse[:, :2].dot([x1, y1]) - [sx1, sy1]
+    cv2.warpAffine(cv_img[sy1:sy2, sx1:sx2], inverse, (x2 - x1, y2 - y1), dst=dst,
+                   flags=interpolation | cv2.WARP_INVERSE_MAP,
+                   borderMode=cv2.BORDER_REPLICATE)
+
+def render_slot(result_image, slot, cv_img, scale_x, scale_y, orig_size=None):
+    '''
+    슬롯 하나의 이미지를 결과 이미지에 그리는 함수
+    라벨 안에 보이는 부분만 리샘플링한다.
+    '''
+    image_size = (cv_img.shape[1], cv_img.shape[0])
+    matrix = slot_matrix(slot, image_size, scale_x, scale_y, orig_size)
+    x1, y1, x2, y2 = slot_region(slot, image_size, matrix, scale_x, scale_y)
+    if y2 <= y1 or x2 <= x1:
+        return
+
+    warp_slot(cv_img, result_image[y1:y2, x1:x2], matrix, (x1, y1, x2, y2))
+
+def slot_sample_factor(slot, scale_x, scale_y):
+    '''
+    슬롯의 원본 1px 이 출력에서 차지하는 최대 픽셀 수를 계산하는 함수
+    1 보다 작으면 원본을 그만큼 줄여도 출력 결과의 해상도가 같다.
+    '''
+    return float(slot["scale"]) * 0.01 * max(scale_x, scale_y)
+
+def slot_workers(count, workers=None):
+    '''
+    슬롯 count 개를 그릴 스레드 수를 정하는 함수
+    workers 가 None 이면 XYZ_SLOT_WORKERS 환경 변수, 0 이하이면 CPU 코어 수를 사용한다.
+    '''
+    if workers is None:
+        workers = SLOT_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, count))
+
+def slots_overlap(slots, scale_x, scale_y):
+    '''
+    출력 좌표에서 슬롯 라벨끼리 겹치는지 확인하는 함수
+    겹치면 나중 슬롯이 위에 그려져야 하므로 순서대로 그린다.
+    '''
+    rects = []
+    for slot in slots:
+        pos_x, pos_y, label_width, label_height = slot["rect"]
+        x1, y1 = int(pos_x * scale_x), int(pos_y * scale_y)
+        rects.append((x1, y1, x1 + int(label_width * scale_x), y1 + int(label_height * scale_y)))
+
+    for index, (x1, y1, x2, y2) in enumerate(rects):
+        for ox1, oy1, ox2, oy2 in rects[index + 1:]:
+            if x1 < ox2 and ox1 < x2 and y1 < oy2 and oy1 < y2:
+                return True
+    return False
+
+def render_slots(result_image, slots, images, scale_x, scale_y, workers=None, progress=None, cap=None):
+    '''
+    모든 슬롯의 이미지를 읽어 결과 이미지에 그리는 함수
+
+    images 의 이미지가 원본보다 작으면 슬롯의 orig_size 에 원본 크기가 있어야 한다.
+    cap 이 참이면 (None 이면 CAP_ORIGINALS) 경로에서 읽는 사진은 출력에 필요한 크기까지만 디코딩한다.
+
+    슬롯은 서로 겹치지 않는 영역에 쓰고 디코딩과 warpAffine 은 GIL 을 놓으므로
+    스레드 풀에서 동시에 그린다. 그동안 OpenCV 내부 스레드는 코어 수 / 작업 스레드 수로
+    줄였다가 끝나면 되돌린다. 라벨이 겹치거나 스레드가 1개이면 순서대로 그린다.
+    progress(완료 수, 전체 수) 는 호출한 스레드에서 불리며, 예외가 나면 남은 슬롯은 취소한다.
+    '''
+    if cap is None:
+        cap = CAP_ORIGINALS
+
+    def render(idx):
+        slot = slots[idx]
+        cv_img = images[idx] if images is not None else None
+        orig_size = slot.get("orig_size")
+        if cv_img is None and slot.get("image_path"):
+            with tracer.stage("slot_decode", index=idx, path=slot["image_path"], capped=bool(cap)) as info:
+                if cap:
+                    cv_img, orig_size = read_capped_image(slot["image_path"], slot_sample_factor(slot, scale_x, scale_y))
+                else:
+                    cv_img, orig_size = read_image(slot["image_path"]), None
+                info["image"] = array_info(cv_img)
+        if cv_img is None:
+            return  # 이미지가 없으면 건너뛰기
+
+        try:
+            with tracer.stage("slot_resize", index=idx, source=array_info(cv_img), scale=slot["scale"]):
+                render_slot(result_image, slot, cv_img, scale_x, scale_y, orig_size)
+        except ValueError as e:
+            print(f"Error copying image {idx}: {e}")
+
+    total = len(slots)
+    workers = slot_workers(total, workers)
+    if workers == 1 or slots_overlap(slots, scale_x, scale_y):
+        for idx in range(total):
+            render(idx)
+            if progress is not None:
+                progress(idx + 1, total)
+        return
+
+    cv_threads = cv2.getNumThreads()
+    cv2.setNumThreads(max(1, (os.cpu_count() or 1) // workers))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = []
+    try:
+        futures = [executor.submit(render, idx) for idx in range(total)]
+        for done, future in enumerate(as_completed(futures), 1):
+            future.result()
+            if progress is not None:
+                progress(done, total)
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+        cv2.setNumThreads(cv_threads)
+
+def blend_frame(result_image, frame):
+    '''
+    프레임 이미지를 결과 이미지 위에 합성하는 함수
+
+    (255 - a) * 배경 + a * 프레임 을 uint16 정수 연산으로 계산하고 255 로 나눈
+    몫을 취한다. 전체 크기의 float 임시 배열 대신 BLEND_ROWS 줄 단위로 처리하여
+    작업 메모리가 줄 단위 버퍼 크기로 제한된다.
+    '''
+    if frame.shape[2] == 4:  # 알파 채널이 있는 경우
+        height, width = result_image.shape[:2]
+        rows = min(BLEND_ROWS, height)
+
+        # 줄 단위 작업 버퍼 (최대값 255 * 255 = 65025 이므로 uint16 으로 충분)
+        blended = np.empty((rows, width, 3), dtype=np.uint16)
+        overlay = np.empty((rows, width, 3), dtype=np.uint16)
+        inverse = np.empty((rows, width, 1), dtype=np.uint16)
+
+        for y in range(0, height, rows):
+            background = result_image[y:y + rows]
+            strip = frame[y:y + rows]
+            n = background.shape[0]
+            alpha = strip[:, :, 3:4]
+
+            np.subtract(255, alpha, out=inverse[:n], dtype=np.uint16)
+            np.multiply(background, inverse[:n], out=blended[:n], dtype=np.uint16)
+            np.multiply(strip[:, :, :3], alpha, out=overlay[:n], dtype=np.uint16)
+            blended[:n] += overlay[:n]
+
+            # x // 255 와 같은 값을 나눗셈 없이 계산 (x <= 65025 에서 정확)
+            np.right_shift(blended[:n], 8, out=overlay[:n])
+            overlay[:n] += 1
+            blended[:n] += overlay[:n]
+            blended[:n] >>= 8
+            np.copyto(background, blended[:n], casting='unsafe')
+    else:  # 알파 채널이 없는 경우
+        # 단순히 프레임으로 덮어쓰기
+        result_image = frame.copy()
+
+    return result_image
+
+def horizontal_text_tiles(layout, scale_x, scale_y):
+    '''
+    가로 방향 프레임의 세로쓰기 문구를 (RGBA 조각, x, y) 목록으로 만드는 함수
+    '''
+    tiles = []
+    for label_index, text_label in enumerate(layout.get("texts", [])):
+        text = text_label.get("text")
+        if not text:
+            continue
+
+        # 텍스트 라벨의 위치 및 크기 계산
+        pos_x, pos_y, label_width, label_height = text_label["rect"]
+        target_width = int(label_width * scale_x)    # 텍스트 라벨의 가로 (스케일 적용)
+        target_height = int(label_height * scale_y)  # 텍스트 라벨의 세로 (스케일 적용)
+        text_x = int(pos_x * scale_x)
+
+        # 한글 폰트 설정
+        orig_font_size = text_label["font_size"]
+        font_size = output_font_size(layout, orig_font_size)
+        font_path = font_path_of(layout)
+        padding = int(font_size * 0.3)
+
+        # 텍스트를 줄 단위로 분리
+        lines = text.split('\n')
+
+        # 전체 높이 계산 (모든 줄의 높이 합)
+        total_text_height = 0
+        line_heights = []
+        for line in lines:
+            line_height = len(line) * int(font_size * 1.2)  # 줄 간격
+            line_heights.append(line_height)
+            total_text_height += line_height
+
+        # 수직 중앙 정렬을 위한 시작 y 위치 계산
+        start_y = (target_height - total_text_height) / 2
+        current_y = start_y
+
+        # 각 줄에 대해 처리
+        for line_idx, line in enumerate(lines):
+            # 각 줄의 문자를 세로로 그리기
+            for char_idx, char in enumerate(line):
+                # 기울어진 문자 이미지와 크기 (캐시)
+                temp_img, char_width = sheared_glyph(font_path, font_size, char)
+
+                # 라벨 위치에 따라 정렬 방식 다르게 적용
+                if label_index == 0:  # 첫 번째 라벨 - 오른쪽 정렬
+                    x_position = text_x + (target_width - char_width)
+                elif label_index == 1:  # 두 번째 라벨 - 중앙 정렬
+                    x_position = text_x + (target_width - char_width) / 2
+                else:  # 세 번째 라벨 - 왼쪽 정렬
+                    x_position = text_x
+
+                y_position = current_y + (char_idx * int(font_size * 1.2))
+
+                # 기울어진 문자의 합성 위치 (위치 조정)
+                paste_x = max(0, int(x_position - padding))  # 왼쪽으로 이동 감소
+                paste_y = max(0, int(y_position))
+                tiles.append((temp_img, paste_x, paste_y))
+
+            # 다음 줄의 시작 y 위치 업데이트
+            current_y += line_heights[line_idx] + orig_font_size  # 줄 간격 추가
+
+    return tiles
+
+def vertical_text_tiles(layout, scale_x, scale_y):
+    '''
+    세로 방향 프레임의 가로쓰기 문구를 (RGBA 조각, x, y) 목록으로 만드는 함수
+    '''
+    tiles = []
+    texts = layout.get("texts", [])
+    if not texts:
+        return tiles
+
+    text_label = texts[0]
+    text = text_label.get("text")
+    if not text:
+        return tiles
+
+    # 텍스트 라벨의 위치 및 크기 계산
+    pos_x, pos_y, label_width, label_height = text_label["rect"]
+    target_width = int(label_width * scale_x)
+    text_x = int(pos_x * scale_x)
+    text_y = int(pos_y * scale_y)
+
+    # 한글 폰트 설정
+    orig_font_size = text_label["font_size"]
+    font_size = output_font_size(layout, orig_font_size)
+    font = load_font(font_path_of(layout), font_size)
+
+    padding = int(font_size)
+
+    lines = text.split('\n')
+    line_height = font_size + orig_font_size  # 줄 간격 조정
+
+    # 텍스트 블록을 라벨 내에서 수직 중앙 정렬
+    start_y = text_y + int(font_size * 0.2)
+
+    # 각 줄의 텍스트 그리기
+    for i, line in enumerate(lines):
+        # 텍스트 크기 계산
+        with font_lock:
+            bbox = font.getbbox(line)
+        text_width = bbox[2] - bbox[0]
+
+        # 기울어진 텍스트를 위한 더 넓은 임시 이미지 생성
+        temp_width = int(text_width * 1.5)  # 기울기를 위한 여유 공간
+        temp_img = Image.new('RGBA',
+                             (temp_width, int(font_size * 2)),
+                             (255, 255, 255, 0))
+        temp_draw = ImageDraw.Draw(temp_img)
+
+        # 임시 이미지의 중앙에 텍스트 그리기
+        temp_x = (temp_width - text_width) // 2
+        with font_lock:
+            temp_draw.text((temp_x, padding/2), line, font=font, fill=(0, 0, 0))
+
+        # 기울임 변환 행렬 적용
+        temp_img = temp_img.transform(
+            temp_img.size,
+            Image.AFFINE,
+            (1, SHEAR_FACTOR, 0, 0, 1, 0),
+            Image.BICUBIC
+        )
+
+        # 기울어진 텍스트의 실제 너비 계산 (알파가 0보다 큰 영역)
+        non_empty = temp_img.getchannel('A').getbbox()
+        if non_empty:
+            left_edge = non_empty[0]
+            right_edge = non_empty[2] - 1
+            actual_width = right_edge - left_edge
+
+            # 최종 이미지에서의 위치 계산 (중앙 정렬)
+            x_position = text_x + (target_width - actual_width) // 2
+            # left_edge만큼 왼쪽으로 이동하여 보정
+            x_position -= left_edge
+        else:
+            x_position = text_x
+
+        y_position = start_y + (i * line_height)
+
+        tiles.append((temp_img, int(x_position), int(y_position)))
+
+    return tiles
+
+def composite_text_tiles(result_image, tiles):
+    '''
+    문구 조각들을 하나의 RGBA 레이어에 모은 뒤 결과 이미지에 한 번만 합성하는 함수
+    레이어는 조각들을 감싸는 영역 크기이므로 캔버스 전체를 PIL로 변환하지 않는다.
+    '''
+    height, width = result_image.shape[:2]
+    if not tiles:
+        return result_image
+
+    # 모든 조각을 감싸는 영역 (캔버스 밖은 제외)
+    left = max(0, min(x for _, x, _ in tiles))
+    top = max(0, min(y for _, _, y in tiles))
+    right = min(width, max(x + tile.width for tile, x, _ in tiles))
+    bottom = min(height, max(y + tile.height for tile, _, y in tiles))
+    if right <= left or bottom <= top:
+        return result_image
+
+    layer = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+    for tile, x, y in tiles:
+        dest_x = x - left
+        dest_y = y - top
+
+        # 레이어 밖으로 나간 부분은 잘라서 합성
+        source_x = max(0, -dest_x)
+        source_y = max(0, -dest_y)
+        source_right = min(tile.width, layer.width - dest_x)
+        source_bottom = min(tile.height, layer.height - dest_y)
+        if source_right <= source_x or source_bottom <= source_y:
+            continue
+
+        layer.alpha_composite(tile, dest=(dest_x + source_x, dest_y + source_y),
+                              source=(source_x, source_y, source_right, source_bottom))
+
+    # RGBA 레이어를 BGRA로 바꿔 해당 영역에만 알파 블렌딩
+    layer_bgra = cv2.cvtColor(np.asarray(layer), cv2.COLOR_RGBA2BGRA)
+    blend_frame(result_image[top:bottom, left:right], layer_bgra)
+    return result_image
+
+def render_layout(layout, images=None, progress=None, workers=None):
+    '''
+    레이아웃을 출력 해상도의 BGR 이미지로 렌더링하는 함수
+
+    images 에 이미 디코딩된 슬롯 이미지 목록을 넘기면 파일을 다시 읽지 않는다.
+    progress 에 progress(단계 이름, 진행률 %) 콜백을 넘기면 각 단계 시작 시 호출되며,
+    콜백에서 RenderCancelled 를 발생시키면 렌더링을 중단한다.
+    workers 는 슬롯을 동시에 그릴 스레드 수이다 (render_slots 참고).
+    '''
+    def report(stage, percent):
+        if progress is not None:
+            progress(stage, percent)
+
+    layout = resolve_profile(layout)
+    width_px, height_px = output_size(layout)
+    preview_width, preview_height = layout["preview_size"]
+
+    # 결과 이미지 생성
+    result_image = create_canvas(width_px, height_px)
+
+    # 화면 크기와 출력 크기의 비율 계산
+    scale_x = width_px / preview_width
+    scale_y = height_px / preview_height
+
+    report("slots", 0)
+    render_slots(result_image, layout.get("slots", []), images, scale_x, scale_y, workers,
+                 lambda done, total: report("slots", int(40 * done / total)))
+
+    # 프레임 이미지 추가
+    report("frame", 40)
+    frame_path = layout.get("frame_path") or ""
+    if os.path.exists(frame_path):
+        # 알파 채널을 포함하여 출력 크기로 리사이즈된 프레임 (캐시)
+        frame = frame_cache.get(frame_path, (width_px, height_px))
+        if frame is not None:
+            with tracer.stage("blend", frame=array_info(frame)):
+                result_image = blend_frame(result_image, frame)
+
+    # 텍스트 추가
+    report("text", 70)
+    with tracer.stage("text", texts=len(layout.get("texts", []))) as info:
+        if is_horizontal(layout): # 가로 방향
+            tiles = horizontal_text_tiles(layout, scale_x, scale_y)
+        else:
+            tiles = vertical_text_tiles(layout, scale_x, scale_y)
+        info["tiles"] = len(tiles)
+        result_image = composite_text_tiles(result_image, tiles)
+
+    return apply_color_format(layout, result_image)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="레이아웃 JSON 을 출력 이미지로 렌더링")
+    parser.add_argument("layout", help="레이아웃 JSON 경로")
+    parser.add_argument("output", help="출력 이미지 경로")
+    parser.add_argument("--trace", default=None, help="단계별 시간/메모리를 기록할 JSON lines 경로 (XYZ_TRACE_LOG)")
+    parser.add_argument("--profile", default=None, help="cProfile/tracemalloc 결과를 저장할 폴더 (XYZ_PROFILE_DIR)")
+    args = parser.parse_args(argv[1:])
+    if args.trace:
+        tracer.path = args.trace
+
+    layout = resolve_profile(load_layout(args.layout))
+    print(profiles.format_estimate(profiles.estimate(layout)))
+    with instrument.profiled("export", args.profile), tracer.stage("export", output=args.output):
+        result_image = render_layout(layout)
+        if not write_image(args.output, result_image):
+            print("이미지 저장 중 오류가 발생했습니다.")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
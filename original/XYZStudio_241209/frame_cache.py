@@ -0,0 +1,159 @@
+# _*_ coding: utf-8 _*_
+
+'''
+디코딩 및 리사이즈가 끝난 프레임 템플릿 캐시
+
+(경로, 수정 시각, 파일 크기, 목표 크기) 를 키로 리사이즈된 프레임을 보관한다.
+메모리에는 LRU 방식으로 max_bytes 까지, 디스크에는 .npy 파일로
+max_disk_bytes 까지 보관하므로 같은 프레임으로 반복 출력하면
+PNG 디코딩과 LANCZOS 리사이즈를 모두 건너뛴다.
+
+반환되는 배열은 캐시와 공유되므로 수정하지 말고 필요하면 복사해서 사용한다.
+'''
+
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+from instrument import tracer, array_info
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_DISK_DIR = os.path.join(tempfile.gettempdir(), "xyzstudio_frame_cache")
+
+def read_file(path, flags):
+    '''
+    reader 가 지정되지 않았을 때 사용하는 기본 디코딩 함수
+    '''
+    with open(path, 'rb') as stream:
+        data = np.frombuffer(stream.read(), dtype=np.uint8)
+    return cv2.imdecode(data, flags)
+
+class FrameCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, disk_dir=None, max_disk_bytes=DEFAULT_MAX_DISK_BYTES,
+                 reader=None):
+        self.reader = reader or read_file
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.lock = threading.Lock()
+
+    def make_key(self, path, size, flags=cv2.IMREAD_UNCHANGED):
+        '''
+        캐시 키를 만드는 함수
+        파일이 바뀌면 수정 시각과 크기가 달라지므로 자동으로 새 키가 된다.
+        '''
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, int(size[0]), int(size[1]), flags)
+
+    def get(self, path, size, flags=cv2.IMREAD_UNCHANGED):
+        '''
+        size (가로, 세로) 로 리사이즈된 프레임 이미지를 반환하는 함수
+        디코딩에 실패하면 None 을 반환한다.
+        '''
+        key = self.make_key(path, size, flags)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        frame = None
+        if self.disk_dir:
+            with tracer.stage("frame_disk", path=path) as info:
+                frame = self.load_disk(key)
+                info["frame"] = array_info(frame)
+        if frame is None:
+            with tracer.stage("frame_decode", path=path) as info:
+                frame = self.reader(path, flags)
+                info["frame"] = array_info(frame)
+            if frame is None:
+                return None
+            with tracer.stage("frame_resize", size=[key[3], key[4]]) as info:
+                frame = cv2.resize(frame, (key[3], key[4]), interpolation=cv2.INTER_LANCZOS4)
+                info["frame"] = array_info(frame)
+            self.save_disk(key, frame)
+
+        self.put(key, frame)
+        return frame
+
+    def put(self, key, frame):
+        '''
+        메모리 캐시에 추가하고 한도를 넘으면 오래된 항목부터 제거하는 함수
+        '''
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = frame
+            self.current_bytes += frame.nbytes
+            while self.current_bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, digest + ".npy")
+
+    def load_disk(self, key):
+        '''
+        디스크 캐시에서 프레임을 읽는 함수
+        '''
+        if not self.disk_dir:
+            return None
+
+        path = self.disk_path(key)
+        try:
+            frame = np.load(path)
+            os.utime(path)  # 디스크 LRU 순서 갱신
+            return frame
+        except (OSError, ValueError):
+            return None
+
+    def save_disk(self, key, frame):
+        '''
+        디스크 캐시에 프레임을 저장하는 함수
+        다른 프로세스가 동시에 읽을 수 있으므로 임시 파일에 쓴 뒤 교체한다.
+        '''
+        if not self.disk_dir:
+            return
+
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            path = self.disk_path(key)
+            temp_path = "{}.{}.tmp".format(path, os.getpid())
+            with open(temp_path, 'wb') as f:
+                np.save(f, frame)
+            os.replace(temp_path, path)
+            self.trim_disk()
+        except OSError as e:
+            print(f"Error saving frame cache: {e}")
+
+    def trim_disk(self):
+        '''
+        디스크 캐시가 한도를 넘으면 가장 오래 사용하지 않은 파일부터 지우는 함수
+        '''
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".npy"):
+                path = os.path.join(self.disk_dir, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
@@ -0,0 +1,173 @@
+# _*_ coding: utf-8 _*_
+
+'''
+슬롯 사진 저장소
+
+모든 프레임 모드의 슬롯 사진을 (모드, 인덱스) 키로 보관한다.
+디코딩된 사진의 합계가 max_bytes 를 넘으면 화면에 보이지 않는 모드의 사진부터
+오래 사용하지 않은 순서로 메모리에서 내리고 경로만 남긴다.
+내려간 사진은 다시 필요할 때 loader 로 원본 파일에서 다시 디코딩한다.
+'''
+
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+def budget_from_env(default=DEFAULT_MAX_BYTES):
+    '''
+    XYZ_IMAGE_BUDGET_MB 환경 변수로 메모리 한도를 정하는 함수
+    '''
+    value = os.environ.get("XYZ_IMAGE_BUDGET_MB")
+    if not value:
+        return default
+    try:
+        return int(float(value) * 1024 * 1024)
+    except ValueError:
+        print(f"Invalid XYZ_IMAGE_BUDGET_MB: {value}")
+        return default
+
+class ImageStore:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, loader=None, on_evict=None):
+        self.max_bytes = max_bytes
+        self.loader = loader  # loader(key, path, full) -> 이미지 또는 None
+        self.on_evict = on_evict  # on_evict(key), 미리보기 캐시 등 사진을 참조하는 곳을 비운다
+        self.entries = OrderedDict()  # {키: {"image", "path", "full"}}, 오래 사용하지 않은 순서
+        self.current_bytes = 0
+        self.visible_mode = None
+        self.lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def put(self, key, image, path, full=True):
+        '''
+        사진을 추가하거나 교체하는 함수
+        full 은 사진이 원본 전체 해상도로 디코딩되었는지 여부이다.
+        '''
+        with self.lock:
+            self.remove_entry(key)
+            self.entries[key] = {"image": image, "path": path, "full": full}
+            self.current_bytes += image.nbytes
+        self.trim()
+
+    def put_path(self, key, path, full=False):
+        '''
+        디코딩하지 않고 경로만 추가하는 함수
+        사진은 처음 get 할 때 loader 로 디코딩한다.
+        '''
+        with self.lock:
+            self.remove_entry(key)
+            self.entries[key] = {"image": None, "path": path, "full": full}
+
+    def get(self, key):
+        '''
+        사진을 반환하는 함수
+        메모리에서 내려간 사진은 경로에서 다시 디코딩한다. 슬롯이 비어 있으면 None 을 반환한다.
+        '''
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            if entry["image"] is not None:
+                return entry["image"]
+            path, full = entry["path"], entry["full"]
+
+        if self.loader is None:
+            return None
+        image = self.loader(key, path, full)
+        if image is None:
+            return None
+
+        with self.lock:
+            # 다시 디코딩하는 동안 슬롯이 바뀌었으면 저장하지 않는다
+            entry = self.entries.get(key)
+            if entry is None or entry["path"] != path:
+                return image
+            if entry["image"] is None:
+                entry["image"] = image
+                self.current_bytes += image.nbytes
+        self.trim()
+        return image
+
+    def peek(self, key):
+        '''
+        메모리에 있는 사진만 반환하는 함수 (다시 디코딩하지 않음)
+        '''
+        entry = self.entries.get(key)
+        return entry["image"] if entry else None
+
+    def path(self, key):
+        entry = self.entries.get(key)
+        return entry["path"] if entry else None
+
+    def is_full(self, key):
+        entry = self.entries.get(key)
+        return bool(entry and entry["full"])
+
+    def remove_entry(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None and entry["image"] is not None:
+            self.current_bytes -= entry["image"].nbytes
+
+    def discard(self, key):
+        '''
+        슬롯의 사진을 지우는 함수
+        '''
+        with self.lock:
+            self.remove_entry(key)
+
+    def discard_mode(self, mode):
+        '''
+        한 프레임 모드에 속한 모든 슬롯의 사진을 지우는 함수
+        '''
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == mode]:
+                self.remove_entry(key)
+
+    def set_visible(self, mode):
+        '''
+        화면에 보이는 모드를 바꾸고 한도를 넘으면 다른 모드의 사진을 내리는 함수
+        '''
+        self.visible_mode = mode
+        self.trim()
+
+    def trim(self):
+        '''
+        한도를 넘으면 보이지 않는 모드의 사진을 오래 사용하지 않은 순서로 메모리에서 내리는 함수
+        보이는 모드의 사진은 한도를 넘어도 내리지 않는다.
+        '''
+        evicted = []
+        with self.lock:
+            for key, entry in self.entries.items():
+                if self.current_bytes <= self.max_bytes:
+                    break
+                if key[0] == self.visible_mode or entry["image"] is None:
+                    continue
+                self.current_bytes -= entry["image"].nbytes
+                entry["image"] = None
+                evicted.append(key)
+
+        if self.on_evict is not None:
+            for key in evicted:
+                self.on_evict(key)
+
+    def usage(self):
+        '''
+        메모리 사용량 (바이트), 메모리에 있는 사진 수, 내려간 사진 수를 반환하는 함수
+        '''
+        with self.lock:
+            resident = sum(1 for entry in self.entries.values() if entry["image"] is not None)
+            return self.current_bytes, resident, len(self.entries) - resident
+
+    def format_usage(self):
+        '''
+        사용량을 화면 표시용 문자열로 만드는 함수
+        '''
+        current_bytes, resident, evicted = self.usage()
+        message = "사진 메모리 {:.0f}/{:.0f}MB".format(current_bytes / (1024 * 1024), self.max_bytes / (1024 * 1024))
+        if evicted:
+            message += " (내림 {}장)".format(evicted)
+        return message
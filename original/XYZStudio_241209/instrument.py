@@ -0,0 +1,160 @@
+# _*_ coding: utf-8 _*_
+
+'''
+단계별 시간/메모리 기록과 cProfile/tracemalloc 캡처
+
+XYZ_TRACE_LOG 에 파일 경로를 지정하면 사진 디코딩, 프레임 디코딩/리사이즈, 슬롯 리샘플링,
+알파 블렌딩, 문구 그리기, 인코딩, 파일 쓰기 같은 주요 단계마다 JSON 한 줄을 추가한다.
+
+    {"ts": 1700000000.123, "pid": 1234, "thread": "MainThread", "stage": "blend",
+     "seconds": 0.052, "peak_rss_mb": 812.4, "frame": {"shape": [4724, 7087, 4], "bytes": 133918112}}
+
+예외로 끝난 단계는 "error" 키가 추가되고, 출력 실패는 "error" 단계로 traceback 을 남긴다.
+지정하지 않으면 아무것도 기록하지 않는다.
+
+XYZ_PROFILE_DIR 에 폴더를 지정하면 출력 한 번마다 cProfile 통계(.prof), tracemalloc
+스냅샷(.tracemalloc)과 요약(.txt)을 그 폴더에 저장한다. cProfile 은 출력을 시작한
+스레드만 기록하므로 engine 의 슬롯 작업 스레드에서 실행된 부분은 포함되지 않는다.
+'''
+
+import os
+import sys
+import json
+import time
+import io
+import threading
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_FRAMES = 25  # tracemalloc 이 기록할 호출 스택 깊이
+PROFILE_TOP = 40  # 요약에 적을 함수/할당 위치 수
+
+def peak_rss_mb():
+    '''
+    프로세스의 최대 메모리 사용량 (RSS, MB)을 반환하는 함수 (측정할 수 없으면 None)
+    '''
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        usage *= 1024  # Linux 는 KB 단위
+    return round(usage / (1024 * 1024), 1)
+
+def array_info(array):
+    '''
+    배열의 크기 정보를 기록용 dict 로 만드는 함수
+    '''
+    if array is None:
+        return None
+    return {"shape": list(array.shape), "bytes": int(array.nbytes)}
+
+class Tracer:
+    def __init__(self, path=None):
+        self.path = path or None
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        '''
+        기록 한 줄을 파일에 추가하는 함수
+        '''
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        try:
+            with self.lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Error writing trace log: {e}")
+
+    def event(self, stage, **fields):
+        '''
+        시간 측정 없이 한 줄을 기록하는 함수
+        '''
+        if not self.path:
+            return
+        record = {"ts": round(time.time(), 3), "pid": os.getpid(),
+                  "thread": threading.current_thread().name, "stage": stage}
+        record.update(fields)
+        self.write(record)
+
+    @contextmanager
+    def stage(self, stage, **fields):
+        '''
+        with 블록의 실행 시간과 최대 메모리 사용량을 기록하는 함수
+        블록 안에서 반환된 dict 에 값을 넣으면 (예: 결과 배열 크기) 함께 기록한다.
+        '''
+        if not self.path:
+            yield {}
+            return
+
+        info = dict(fields)
+        start = time.perf_counter()
+        try:
+            yield info
+        except BaseException as e:
+            info["error"] = "{}: {}".format(type(e).__name__, e)
+            raise
+        finally:
+            seconds = round(time.perf_counter() - start, 6)
+            self.event(stage, seconds=seconds, peak_rss_mb=peak_rss_mb(), **info)
+
+# 모든 모듈이 함께 쓰는 기록기
+tracer = Tracer(os.environ.get("XYZ_TRACE_LOG"))
+
+@contextmanager
+def profiled(name, directory=None):
+    '''
+    with 블록 하나를 cProfile 과 tracemalloc 으로 기록하여 directory 에 저장하는 함수
+    directory 가 None 이면 XYZ_PROFILE_DIR 을 사용하고, 둘 다 없으면 아무것도 하지 않는다.
+    '''
+    directory = directory or os.environ.get("XYZ_PROFILE_DIR")
+    if not directory:
+        yield
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    prefix = os.path.join(directory, "{}-{}-{}".format(name, time.strftime("%Y%m%d-%H%M%S"), os.getpid()))
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(PROFILE_FRAMES)
+    elif hasattr(tracemalloc, "reset_peak"):  # 이미 기록 중이면 최대값만 초기화 (Python 3.9+)
+        tracemalloc.reset_peak()
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        if started:
+            tracemalloc.stop()
+
+        try:
+            profile.dump_stats(prefix + ".prof")
+            snapshot.dump(prefix + ".tracemalloc")
+            with open(prefix + ".txt", 'w', encoding='utf-8') as f:
+                f.write(summarize(profile, snapshot, traced_peak))
+            tracer.event("profile", name=name, path=prefix, traced_peak_bytes=traced_peak)
+            print("프로파일 저장: {}.prof".format(prefix))
+        except OSError as e:
+            print(f"Error saving profile: {e}")
+
+def summarize(profile, snapshot, traced_peak):
+    '''
+    누적 시간 상위 함수와 메모리 할당 상위 위치를 사람이 읽을 수 있는 문자열로 만드는 함수
+    '''
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+
+    stream.write("\ntracemalloc 최대 {:.1f}MB, 블록 끝에 남은 할당 상위 {}곳\n".format(
+        traced_peak / (1024 * 1024), PROFILE_TOP))
+    for stat in snapshot.statistics("lineno")[:PROFILE_TOP]:
+        stream.write("{}\n".format(stat))
+    return stream.getvalue()
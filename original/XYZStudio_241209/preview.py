@@ -0,0 +1,110 @@
+# _*_ coding: utf-8 _*_
+
+'''
+미리보기용 이미지 캐시
+
+슬롯마다 원본의 축소 피라미드를 보관하여, 휠 줌으로 크게 축소할 때 원본 대신
+목표 크기에 가까운 피라미드 단계에서 리샘플링한다.
+
+미리보기용 원본은 JPEG DCT 축소 디코딩(IMREAD_REDUCED_COLOR_*)으로 라벨에
+필요한 만큼만 읽고, 전체 해상도 디코딩은 출력할 때 engine 이 한다.
+'''
+
+import cv2
+import engine
+
+# 라벨에 꽉 차게 맞춘 크기의 몇 배까지 업스케일 없이 확대할 수 있게 디코딩할지
+PREVIEW_HEADROOM = 2.0
+
+def load_preview_image(path, label_size, headroom=PREVIEW_HEADROOM):
+    '''
+    라벨 크기에 맞춰 축소 디코딩한 미리보기 원본과 원본 크기를 반환하는 함수
+    라벨에 맞춘 크기의 headroom 배보다 작아지지 않는 가장 큰 축소 비율을 사용한다.
+    '''
+    try:
+        width, height = engine.image_size(path)
+    except (OSError, ValueError):
+        # 헤더를 읽을 수 없으면 전체 해상도로 디코딩
+        cv_img = engine.read_image(path)
+        if cv_img is None:
+            return None, None
+        return cv_img, (cv_img.shape[1], cv_img.shape[0])
+
+    fit_ratio = min(label_size[0] / width, label_size[1] / height)
+    factor = 1
+    for candidate in (8, 4, 2):
+        if candidate * fit_ratio * headroom <= 1:
+            factor = candidate
+            break
+
+    cv_img = engine.read_image(path, engine.REDUCED_FLAGS.get(factor, cv2.IMREAD_COLOR))
+    return cv_img, (width, height)
+
+def draw_slot(canvas, old_region, source, scale, moved, orig_size, interpolation=cv2.INTER_LANCZOS4):
+    '''
+    라벨 크기의 canvas 에 슬롯 이미지를 다시 그리고 새로 그린 영역을 반환하는 함수
+    이전에 그린 영역 old_region 만 흰색으로 지운 뒤 출력과 같은 변환 행렬로 보이는 부분만 그리고,
+    중앙선은 매번 그 위에 덮어 그린다.
+    '''
+    height, width = canvas.shape[:2]
+    old_x1, old_y1, old_x2, old_y2 = old_region
+    canvas[old_y1:old_y2, old_x1:old_x2] = 255
+
+    region = (0, 0, 0, 0)
+    slot = {"rect": [0, 0, width, height], "scale": scale, "moved": moved}
+    image_size = (source.shape[1], source.shape[0])
+    matrix = engine.slot_matrix(slot, image_size, 1.0, 1.0, orig_size)
+    x1, y1, x2, y2 = engine.slot_region(slot, image_size, matrix, 1.0, 1.0)
+    if y2 > y1 and x2 > x1:
+        engine.warp_slot(source, canvas[y1:y2, x1:x2], matrix, (x1, y1, x2, y2), interpolation)
+        region = (x1, y1, x2, y2)
+
+    # 중앙선 (BGR 빨간색, 두께 1)
+    canvas[height // 2, :] = (0, 0, 255)
+    canvas[:, width // 2] = (0, 0, 255)
+    return region
+
+class PreviewCache:
+    def __init__(self):
+        self.entries = {}
+
+    def source(self, key, cv_img, size):
+        '''
+        size (가로, 세로) 로 축소해 보여줄 때 리샘플링에 사용할 원본 단계를 반환하는 함수
+        크게 축소할 때 생기는 계단 현상을 줄이기 위해 목표 크기에 가까운 피라미드 단계를 사용한다.
+        '''
+        entry = self.entries.get(key)
+        if entry is None or entry["source"] is not cv_img:
+            entry = {"source": cv_img, "pyramid": [cv_img]}
+            self.entries[key] = entry
+        return self.pyramid_level(entry["pyramid"], size[0], size[1])
+
+    def pyramid_level(self, pyramid, width, height):
+        '''
+        목표 크기보다 작아지지 않는 가장 작은 피라미드 단계를 반환하는 함수
+        필요한 단계는 처음 요청될 때 원본을 절반씩 줄여 만든다.
+        '''
+        level = pyramid[0]
+        for index in range(1, 32):
+            half_width = level.shape[1] // 2
+            half_height = level.shape[0] // 2
+            if half_width < width or half_height < height:
+                break
+
+            if index == len(pyramid):
+                pyramid.append(cv2.resize(level, (half_width, half_height), interpolation=cv2.INTER_AREA))
+            level = pyramid[index]
+        return level
+
+    def discard(self, key):
+        '''
+        슬롯의 캐시를 비우는 함수
+        '''
+        self.entries.pop(key, None)
+
+    def discard_mode(self, mode):
+        '''
+        한 프레임 모드에 속한 모든 슬롯의 캐시를 비우는 함수
+        '''
+        for key in [key for key in self.entries if key[0] == mode]:
+            del self.entries[key]
@@ -0,0 +1,152 @@
+# _*_ coding: utf-8 _*_
+
+'''
+출력 프로파일 (인화 크기, DPI, 방향, 색상 형식)
+
+Program 과 engine 이 같은 프로파일 목록을 사용한다.
+size 는 [긴 변, 짧은 변] 이고 orientation 이 "auto" 이면 프레임 방향을 따른다.
+프로그램 폴더에 profiles.json 이 있으면 같은 형식의 프로파일을 추가/덮어쓴다.
+
+미리보기 화면은 15x10 비율로 고정되어 있으므로, 출력 비율이 미리보기 비율과 다른
+프로파일(A4 등)은 슬롯 사진이 한 방향으로 늘어나므로 적용하지 않는다. (ValueError)
+'''
+
+import os
+import json
+import copy
+
+PWD = os.path.dirname(os.path.abspath(__file__))
+
+PROFILES = {
+    "15x10_1200": {"title": "15x10cm 1200DPI (최종)", "size": [15, 10], "unit": "cm", "dpi": 1200,
+                   "orientation": "auto", "color_format": "color"},
+    "15x10_600": {"title": "15x10cm 600DPI", "size": [15, 10], "unit": "cm", "dpi": 600,
+                  "orientation": "auto", "color_format": "color"},
+    "15x10_300": {"title": "15x10cm 300DPI (교정용)", "size": [15, 10], "unit": "cm", "dpi": 300,
+                  "orientation": "auto", "color_format": "color"},
+    "15x10_300_gray": {"title": "15x10cm 300DPI 흑백 (교정용)", "size": [15, 10], "unit": "cm", "dpi": 300,
+                       "orientation": "auto", "color_format": "gray"},
+    "6x4in_300": {"title": "6x4inch 300DPI", "size": [6, 4], "unit": "inch", "dpi": 300,
+                  "orientation": "auto", "color_format": "color"},
+}
+DEFAULT_PROFILE = "15x10_1200"
+
+# 출력과 미리보기의 가로/세로 비율 허용 오차 (15x10cm 출력과 719x483 미리보기는 약 0.8% 차이)
+ASPECT_TOLERANCE = 0.02
+
+# 렌더링 시간 추정 계수 (15x10cm 1200DPI 기준 측정값, 출력 메가픽셀당 초)
+SECONDS_PER_MEGAPIXEL = 0.15
+
+def load_profiles(path=os.path.join(PWD, "profiles.json")):
+    '''
+    profiles.json 의 프로파일을 기본 목록에 추가하는 함수
+    '''
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        PROFILES.update(json.load(f))
+
+def pixel_size(size_cm, dpi):
+    '''
+    출력 크기 (cm)와 DPI로 픽셀 크기 (가로, 세로)를 계산하는 함수
+    '''
+    width_cm, height_cm = size_cm
+
+    # inch 프로파일은 cm 로 바꾸며 생긴 부동소수점 오차로 1px 작아지지 않도록 반올림 후 버림
+    return int(round((width_cm * dpi) / 2.54, 6)), int(round((height_cm * dpi) / 2.54, 6))
+
+def get_profile(name):
+    '''
+    이름으로 프로파일을 찾는 함수
+    '''
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError("알 수 없는 출력 프로파일입니다: {}".format(name))
+
+def print_size_cm(profile, horizontal):
+    '''
+    프로파일과 프레임 방향으로 출력 크기 [가로, 세로] (cm)를 계산하는 함수
+    '''
+    long_side, short_side = sorted(profile["size"], reverse=True)
+    if profile.get("unit", "cm") == "inch":
+        long_side *= 2.54
+        short_side *= 2.54
+
+    orientation = profile.get("orientation", "auto")
+    if orientation == "auto":
+        orientation = "horizontal" if horizontal else "vertical"
+
+    if orientation == "horizontal":
+        return [long_side, short_side]
+    return [short_side, long_side]
+
+def aspect_matches(profile, preview_size):
+    '''
+    프로파일의 출력 비율이 미리보기 비율과 같은지 확인하는 함수
+    '''
+    preview_width, preview_height = preview_size
+    width_cm, height_cm = print_size_cm(profile, preview_width > preview_height)
+    preview_aspect = preview_width / preview_height
+    return abs(width_cm / height_cm - preview_aspect) <= preview_aspect * ASPECT_TOLERANCE
+
+def apply_profile(layout, name):
+    '''
+    레이아웃에 프로파일의 출력 크기, DPI, 색상 형식을 적용한 사본을 반환하는 함수
+    '''
+    profile = get_profile(name)
+    preview_width, preview_height = layout["preview_size"]
+    if not aspect_matches(profile, layout["preview_size"]):
+        raise ValueError("출력 프로파일의 비율이 미리보기와 다릅니다: {}".format(name))
+
+    layout = copy.deepcopy(layout)
+    layout["profile"] = name
+    layout["print_size_cm"] = print_size_cm(profile, preview_width > preview_height)
+    layout["dpi"] = profile["dpi"]
+    layout["color_format"] = profile.get("color_format", "color")
+    return layout
+
+def max_output_scale(preview_size):
+    '''
+    적용할 수 있는 프로파일 중 미리보기 1px 이 출력에서 차지하는 가장 큰 픽셀 수를 계산하는 함수
+    '''
+    preview_width, preview_height = preview_size
+    result = 0.0
+    for profile in PROFILES.values():
+        if not aspect_matches(profile, preview_size):
+            continue
+        width_px, height_px = pixel_size(print_size_cm(profile, preview_width > preview_height), profile["dpi"])
+        result = max(result, width_px / preview_width, height_px / preview_height)
+    return result
+
+def estimate(layout):
+    '''
+    렌더링 전에 출력 크기, 메모리 사용량, 예상 시간을 계산하는 함수
+
+    canvas_bytes 는 결과 이미지, frame_bytes 는 출력 크기 RGBA 프레임 크기이고
+    peak_bytes 는 두 배열과 문구/블렌딩 작업 여유분을 더한 대략적인 최대치이다.
+    '''
+    width_px, height_px = pixel_size(layout["print_size_cm"], layout["dpi"])
+    pixels = width_px * height_px
+    canvas_bytes = pixels * 3
+    frame_bytes = pixels * 4
+    peak_bytes = canvas_bytes + frame_bytes + canvas_bytes // 10
+    if layout.get("color_format") == "gray":
+        peak_bytes += pixels  # 흑백 변환 결과
+
+    return {
+        "width_px": width_px,
+        "height_px": height_px,
+        "canvas_bytes": canvas_bytes,
+        "frame_bytes": frame_bytes,
+        "peak_bytes": peak_bytes,
+        "seconds": pixels / 1e6 * SECONDS_PER_MEGAPIXEL
+    }
+
+def format_estimate(result):
+    '''
+    추정 결과를 화면 표시용 문자열로 만드는 함수
+    '''
+    return "{}x{}px, 메모리 약 {:.0f}MB, 예상 {:.1f}초".format(
+        result["width_px"], result["height_px"],
+        result["peak_bytes"] / (1024 * 1024), result["seconds"])
@@ -0,0 +1,140 @@
+# _*_ coding: utf-8 _*_
+
+'''
+프로젝트 파일 (.xyzproj) 저장/불러오기
+
+프레임 모드별 프레임 경로, 슬롯 사진 경로와 배치(scale, moved), 원본 크기, 문구를
+JSON 으로 저장한다. 사진 경로는 프로젝트 파일 기준 상대 경로로 저장하므로
+프로젝트와 사진 폴더를 함께 옮겨도 열 수 있다.
+
+저장할 때 메모리에 있는 사진은 작은 JPEG 썸네일을 base64 로 함께 저장하여
+불러올 때 원본을 디코딩하기 전에 바로 화면에 보여준다 (thumbnail 은 생략 가능).
+
+    {
+        "version": 1,
+        "profile": "15x10_1200",
+        "current_mode": 3,
+        "modes": {
+            "3": {
+                "frame_path": "frames/4_가로.png",
+                "slots": [{"image_path": ..., "orig_size": [w, h], "scale": "37", "moved": [dx, dy], "thumbnail": ...}],
+                "texts": [{"text": ..., "font_size": 12}]
+            }
+        }
+    }
+'''
+
+import os
+import json
+import base64
+import cv2
+import numpy as np
+
+PROJECT_VERSION = 1
+PROJECT_FILTER = "XYZ Project (*.xyzproj)"
+THUMBNAIL_SIZE = 256
+THUMBNAIL_QUALITY = 85
+
+def encode_thumbnail(cv_img, size=THUMBNAIL_SIZE):
+    '''
+    긴 변이 size 이하가 되도록 줄인 JPEG 를 base64 문자열로 만드는 함수
+    '''
+    height, width = cv_img.shape[:2]
+    ratio = min(1.0, size / max(width, height))
+    if ratio < 1.0:
+        cv_img = cv2.resize(cv_img, (max(1, int(width * ratio)), max(1, int(height * ratio))),
+                            interpolation=cv2.INTER_AREA)
+    ret, data = cv2.imencode(".jpg", cv_img, [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_QUALITY])
+    if not ret:
+        return None
+    return base64.b64encode(data.tobytes()).decode('ascii')
+
+def decode_thumbnail(text):
+    '''
+    encode_thumbnail 로 만든 문자열을 BGR 이미지로 디코딩하는 함수
+    '''
+    try:
+        data = np.frombuffer(base64.b64decode(text), dtype=np.uint8)
+    except ValueError:
+        return None
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+def relative_path(path, base_dir):
+    '''
+    가능하면 base_dir 기준 상대 경로로 바꾸는 함수 (다른 드라이브면 절대 경로 유지)
+    '''
+    if not path:
+        return path
+    try:
+        return os.path.relpath(path, base_dir).replace(os.sep, "/")
+    except ValueError:
+        return path
+
+def resolve_path(path, base_dir):
+    '''
+    프로젝트 파일 기준 상대 경로를 절대 경로로 바꾸는 함수
+    '''
+    if not path:
+        return path
+    if os.path.isabs(path):
+        return path
+    return os.path.normpath(os.path.join(base_dir, path))
+
+def save_project(path, project):
+    '''
+    프로젝트를 저장하는 함수
+    경로는 프로젝트 파일 기준 상대 경로로 바꾸고, 임시 파일에 쓴 뒤 교체한다.
+    '''
+    base_dir = os.path.dirname(os.path.abspath(path))
+    data = {
+        "version": PROJECT_VERSION,
+        "profile": project.get("profile"),
+        "current_mode": project.get("current_mode", 0),
+        "modes": {}
+    }
+    for mode, state in project.get("modes", {}).items():
+        slots = []
+        for slot in state.get("slots", []):
+            slot = dict(slot)
+            slot["image_path"] = relative_path(slot.get("image_path"), base_dir)
+            slots.append(slot)
+        data["modes"][str(mode)] = {
+            "frame_path": relative_path(state.get("frame_path"), base_dir),
+            "slots": slots,
+            "texts": state.get("texts", [])
+        }
+
+    temp_path = path + ".part"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+def load_project(path):
+    '''
+    프로젝트를 불러오는 함수
+    모드 키는 정수로, 경로는 절대 경로로 바꿔서 반환한다. 사진은 디코딩하지 않는다.
+    '''
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    version = data.get("version")
+    if version != PROJECT_VERSION:
+        raise ValueError("지원하지 않는 프로젝트 버전입니다: {}".format(version))
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    modes = {}
+    for mode, state in data.get("modes", {}).items():
+        slots = []
+        for slot in state.get("slots", []):
+            slot = dict(slot)
+            slot["image_path"] = resolve_path(slot.get("image_path"), base_dir)
+            slots.append(slot)
+        modes[int(mode)] = {
+            "frame_path": resolve_path(state.get("frame_path"), base_dir),
+            "slots": slots,
+            "texts": state.get("texts", [])
+        }
+
+    data["current_mode"] = int(data.get("current_mode", 0))
+    data["modes"] = modes
+    return data
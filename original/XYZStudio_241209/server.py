@@ -0,0 +1,362 @@
+# _*_ coding: utf-8 _*_
+
+'''
+로컬 HTTP 렌더링 서비스
+
+키오스크 화면 등 다른 프로그램이 Qt 화면 없이 렌더링을 요청할 수 있도록
+engine 레이아웃을 HTTP 로 받아 작업 큐에 넣고 작업 스레드에서 렌더링한다.
+작업 스레드는 한 프로세스 안에 있으므로 프레임 템플릿 캐시 (engine.frame_cache)와
+폰트/글자 캐시를 모든 작업이 함께 쓰고, --warm 으로 넘긴 레이아웃을 시작할 때 한 번
+렌더링하여 미리 채워 둔다. 외부 네트워크는 사용하지 않는다.
+결과 이미지는 메모리가 아니라 결과 폴더 (--results, 기본: 임시 폴더)에 파일로 저장하고
+끝난 작업은 MAX_RESULTS 개까지 보관한다.
+
+    POST   /jobs              레이아웃 JSON (engine.py 참고, "format": "png" 또는 "jpg") -> 202 {"id", ...}
+                              큐가 가득 차면 503 과 Retry-After 를 반환한다.
+    GET    /jobs/<id>         작업 상태 (queued, running, done, failed, cancelled)
+    GET    /jobs/<id>/result  결과 이미지 (끝나지 않았으면 409)
+    DELETE /jobs/<id>         대기 중인 작업 취소 또는 결과 삭제
+    GET    /stats             큐 길이, 처리 수, 렌더링 지연 p50/p95
+    GET    /health
+
+레이아웃의 상대 경로는 --root 폴더 기준이다.
+
+    python server.py [--port 8765] [-j 작업 스레드 수] [--root 폴더] [--results 폴더] [--warm layout.json ...]
+'''
+
+import sys
+import os
+import json
+import time
+import uuid
+import queue
+import shutil
+import argparse
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+import cv2
+import engine
+import profiles
+import batch
+import watcher
+
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 32
+MAX_RESULTS = 64  # 결과 파일을 보관할 끝난 작업 수 (오래된 것부터 삭제)
+MAX_BODY_BYTES = 4 * 1024 * 1024
+LATENCY_WINDOW = 1000
+CONTENT_TYPES = {"png": "image/png", "jpg": "image/jpeg"}
+
+class RenderService:
+    '''
+    작업 큐와 작업 스레드
+    '''
+    def __init__(self, workers=1, queue_size=DEFAULT_QUEUE_SIZE, root=None, results_dir=None):
+        self.root = root or os.getcwd()
+        self.results_dir = results_dir or tempfile.mkdtemp(prefix="xyzstudio_results_")
+        os.makedirs(self.results_dir, exist_ok=True)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.jobs = OrderedDict()  # {id: 작업 dict}, 만든 순서
+        self.lock = threading.Lock()
+        self.running = 0
+        self.done = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # 렌더링 + 인코딩 시간
+        self.waits = deque(maxlen=LATENCY_WINDOW)  # 큐에서 기다린 시간
+        self.threads = [threading.Thread(target=self.work, name="render-{}".format(index), daemon=True)
+                        for index in range(workers)]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def warm(self, layout_paths):
+        '''
+        레이아웃을 한 번씩 렌더링하여 프레임/폰트 캐시를 채우는 함수
+        '''
+        for path in layout_paths:
+            start = time.perf_counter()
+            try:
+                layout = self.prepare(engine.load_layout(path), os.path.dirname(os.path.abspath(path)))
+                engine.render_layout(layout, workers=1)
+                print("캐시 준비: {} ({:.2f}s)".format(path, time.perf_counter() - start))
+            except Exception as e:
+                print(f"Error warming {path}: {e}")
+
+    def prepare(self, layout, base_dir=None):
+        '''
+        요청받은 레이아웃을 검사하고 상대 경로를 절대 경로로 바꾸는 함수
+        '''
+        if not isinstance(layout, dict):
+            raise ValueError("레이아웃은 JSON 객체여야 합니다.")
+        if "preview_size" not in layout:
+            raise ValueError("preview_size 가 없습니다.")
+        base_dir = base_dir or self.root
+        layout = dict(layout)
+        layout["frame_path"] = batch.resolve_path(base_dir, layout.get("frame_path"))
+        layout["font_path"] = batch.resolve_path(base_dir, layout.get("font_path"))
+        slots = []
+        for slot in layout.get("slots", []):
+            if "rect" not in slot:
+                raise ValueError("슬롯에 rect 가 없습니다.")
+            slot = dict(slot)
+            slot["image_path"] = batch.resolve_path(base_dir, slot.get("image_path"))
+            slot.setdefault("scale", "100")
+            slots.append(slot)
+        layout["slots"] = slots
+        engine.resolve_profile(layout)  # 알 수 없는 프로파일이면 ValueError
+        return layout
+
+    def submit(self, layout):
+        '''
+        작업을 큐에 넣고 작업 dict 를 반환하는 함수
+        큐가 가득 차면 queue.Full 이 발생한다.
+        '''
+        if not isinstance(layout, dict):
+            raise ValueError("레이아웃은 JSON 객체여야 합니다.")
+        file_format = str(layout.pop("format", "png")).lower().replace("jpeg", "jpg")
+        if file_format not in CONTENT_TYPES:
+            raise ValueError("지원하지 않는 형식입니다: {}".format(file_format))
+        layout = self.prepare(layout)
+
+        job = {"id": uuid.uuid4().hex, "status": "queued", "format": file_format,
+               "created": time.time(), "started": None, "finished": None, "error": None, "result": None}
+        with self.lock:
+            self.queue.put_nowait((job, layout))
+            self.jobs[job["id"]] = job
+            self.trim()
+        return job
+
+    def trim(self):
+        '''
+        끝난 작업이 MAX_RESULTS 개를 넘으면 오래된 것부터 지우는 함수
+        '''
+        finished = [job_id for job_id, job in self.jobs.items() if job["finished"] is not None]
+        for job_id in finished[:max(0, len(finished) - MAX_RESULTS)]:
+            self.remove_result(self.jobs.pop(job_id))
+
+    def remove_result(self, job):
+        '''
+        작업의 결과 파일을 지우는 함수
+        '''
+        if not job["result"]:
+            return
+        try:
+            os.remove(job["result"])
+        except OSError as e:
+            print(f"Error removing result: {e}")
+
+    def work(self):
+        cv2.setNumThreads(1)  # 작업 스레드끼리 코어를 나눠 쓴다
+        while True:
+            job, layout = self.queue.get()
+            with self.lock:
+                if job["status"] == "cancelled":
+                    continue
+                job["status"] = "running"
+                job["started"] = time.time()
+                self.running += 1
+
+            try:
+                result_image = engine.render_layout(layout, workers=1)
+                # 받는 쪽이 덜 쓴 파일을 읽지 않도록 임시 이름으로 쓴 뒤 교체
+                result = os.path.join(self.results_dir, job["id"] + "." + job["format"])
+                temp_path = os.path.join(self.results_dir, ".part-" + os.path.basename(result))
+                if not engine.write_image(temp_path, result_image):
+                    raise ValueError("이미지 인코딩에 실패했습니다.")
+                os.replace(temp_path, result)
+                status, error = "done", None
+            except Exception as e:
+                print(e)
+                result, status, error = None, "failed", "{}: {}".format(type(e).__name__, e)
+
+            with self.lock:
+                job.update({"status": status, "result": result, "error": error, "finished": time.time()})
+                self.running -= 1
+                if status == "done":
+                    self.done += 1
+                else:
+                    self.failed += 1
+                self.latencies.append(job["finished"] - job["started"])
+                self.waits.append(job["started"] - job["created"])
+                self.trim()
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def delete(self, job_id):
+        '''
+        대기 중인 작업은 취소하고, 끝난 작업은 결과를 지우는 함수
+        렌더링 중인 작업은 지울 수 없으므로 False 를 반환한다.
+        '''
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] == "running":
+                return False
+            if job["status"] == "queued":
+                job["status"] = "cancelled"
+            self.remove_result(self.jobs.pop(job_id))
+            return True
+
+    def describe(self, job):
+        '''
+        작업 상태를 응답용 dict 로 만드는 함수
+        '''
+        result = {"id": job["id"], "status": job["status"], "format": job["format"]}
+        if job["started"] is not None:
+            result["queued_seconds"] = round(job["started"] - job["created"], 3)
+        if job["finished"] is not None:
+            result["seconds"] = round(job["finished"] - job["started"], 3)
+        if job["error"]:
+            result["error"] = job["error"]
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": len(self.threads),
+                "queue_depth": self.queue.qsize(),
+                "queue_size": self.queue.maxsize,
+                "running": self.running,
+                "done": self.done,
+                "failed": self.failed,
+                "latency_p50": watcher.percentile(self.latencies, 50),
+                "latency_p95": watcher.percentile(self.latencies, 95),
+                "wait_p95": watcher.percentile(self.waits, 95),
+                "frame_cache_bytes": engine.frame_cache.current_bytes
+            }
+
+class RequestHandler(BaseHTTPRequestHandler):
+    service = None  # RenderService, make_server 에서 지정
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def job_path(self):
+        '''
+        /jobs/<id> 또는 /jobs/<id>/result 경로를 (id, result 여부)로 나누는 함수
+        '''
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "jobs":
+            return parts[1], False
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result":
+            return parts[1], True
+        return None, False
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0].rstrip("/") != "/jobs":
+            self.send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            self.send_json(413 if length > MAX_BODY_BYTES else 400, {"error": "레이아웃 JSON 이 필요합니다."})
+            return
+        try:
+            layout = json.loads(self.rfile.read(length).decode('utf-8'))
+            job = self.service.submit(layout)
+        except queue.Full:
+            self.send_json(503, {"error": "작업 큐가 가득 찼습니다.", **self.service.stats()}, {"Retry-After": "1"})
+            return
+        except (ValueError, TypeError, KeyError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        result = self.service.describe(job)
+        result["queue_depth"] = self.service.queue.qsize()
+        self.send_json(202, result, {"Location": "/jobs/" + job["id"]})
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/health":
+            self.send_json(200, {"ok": True})
+            return
+        if path == "/stats":
+            self.send_json(200, self.service.stats())
+            return
+
+        job_id, want_result = self.job_path()
+        job = self.service.get(job_id) if job_id else None
+        if job is None:
+            self.send_json(404, {"error": "not found"})
+            return
+        if not want_result:
+            self.send_json(200, self.service.describe(job))
+            return
+        if job["status"] != "done":
+            self.send_json(409, self.service.describe(job))
+            return
+
+        try:
+            f = open(job["result"], 'rb')
+        except OSError:
+            self.send_json(404, {"error": "결과가 삭제되었습니다."})  # 조회하는 사이에 보관 한도로 삭제됨
+            return
+        with f:
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPES[job["format"]])
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile)
+
+    def do_DELETE(self):
+        job_id, _ = self.job_path()
+        if not job_id or self.service.get(job_id) is None:
+            self.send_json(404, {"error": "not found"})
+        elif self.service.delete(job_id):
+            self.send_json(200, {"id": job_id, "deleted": True})
+        else:
+            self.send_json(409, {"error": "렌더링 중인 작업은 지울 수 없습니다."})
+
+    def log_message(self, format, *args):
+        pass  # 요청마다 출력하지 않음
+
+class RenderServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT):
+    '''
+    service 를 사용하는 HTTP 서버를 만드는 함수
+    '''
+    handler = type("Handler", (RequestHandler,), {"service": service})
+    return RenderServer((host, port), handler)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="로컬 HTTP 렌더링 서비스")
+    parser.add_argument("--host", default="127.0.0.1", help="바인딩 주소 (기본: localhost 만)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="작업 스레드 수 (기본: CPU 코어 수)")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE_SIZE, help="대기할 수 있는 최대 작업 수")
+    parser.add_argument("--root", default=None, help="레이아웃의 상대 경로 기준 폴더 (기본: 현재 폴더)")
+    parser.add_argument("--results", default=None, help="결과 이미지를 저장할 폴더 (기본: 임시 폴더)")
+    parser.add_argument("--warm", nargs="*", default=[], help="시작할 때 미리 렌더링하여 캐시를 채울 레이아웃")
+    args = parser.parse_args(argv[1:])
+
+    profiles.load_profiles()
+    service = RenderService(args.jobs or os.cpu_count() or 1, args.queue, args.root, args.results)
+    service.warm(args.warm)
+    service.start()
+
+    server = make_server(service, args.host, args.port)
+    print("렌더링 서비스: http://{}:{}/ (작업 스레드 {}개)".format(args.host, args.port, len(service.threads)))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,88 @@
+# _*_ coding: utf-8 _*_
+
+'''
+engine 슬롯 배치 회귀 테스트
+
+    python -m pytest test_engine.py
+'''
+
+import cv2
+import numpy as np
+import engine
+import tiled
+
+# 15x10cm 1200DPI, 가로 미리보기 (719x483)
+OUTPUT_SIZE = (7086, 4724)
+PREVIEW_SIZE = (719, 483)
+SCALE_X = OUTPUT_SIZE[0] / PREVIEW_SIZE[0]
+SCALE_Y = OUTPUT_SIZE[1] / PREVIEW_SIZE[1]
+
+# 라벨 x=15 는 출력에서 147.83, y=15 는 146.70 (소수부 0.5 이상)
+SLOTS = [
+    {"rect": [15, 15, 120, 90], "scale": "100", "moved": None},
+    {"rect": [15, 15, 120, 90], "scale": "100", "moved": [-7, -5]},
+]
+
+def sample_image(width=400, height=300):
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+
+def baseline_slot(result_image, slot, cv_img, scale_x, scale_y):
+    '''
+    기존 export_image 의 슬롯 배치 (전체 리사이즈 후 라벨 범위로 자르기)
+    '''
+    scale_ratio = float(slot["scale"]) * 0.01
+    width = int(cv_img.shape[1] * scale_ratio * scale_x)
+    height = int(cv_img.shape[0] * scale_ratio * scale_y)
+    scaled_img = cv2.resize(cv_img, (width, height), interpolation=cv2.INTER_LANCZOS4)
+
+    pos_x, pos_y, label_width, label_height = slot["rect"]
+    label_x = int(pos_x * scale_x)
+    label_y = int(pos_y * scale_y)
+    label_right = label_x + int(label_width * scale_x)
+    label_bottom = label_y + int(label_height * scale_y)
+
+    diff_x, diff_y = slot["moved"] or (0, 0)
+    origin_x = label_x + int(diff_x * scale_x)
+    origin_y = label_y + int(diff_y * scale_y)
+
+    x1, y1 = max(label_x, origin_x), max(label_y, origin_y)
+    x2, y2 = min(label_right, origin_x + width), min(label_bottom, origin_y + height)
+    result_image[y1:y2, x1:x2] = scaled_img[y1 - origin_y:y2 - origin_y, x1 - origin_x:x2 - origin_x]
+    return label_x, label_y, label_right, label_bottom
+
+def assert_matches_baseline(got, expected, label):
+    label_x, label_y, label_right, label_bottom = label
+    diff = np.abs(got.astype(int) - expected.astype(int))
+
+    # 라벨 첫 열/첫 줄이 흰색으로 비지 않아야 한다
+    assert diff[label_y:label_bottom, label_x].max() <= 8
+    assert diff[label_y, label_x:label_right].max() <= 8
+    assert diff.max() <= 20
+
+def test_render_slot_label_edge():
+    cv_img = sample_image()
+    for slot in SLOTS:
+        expected = np.full((1100, 1400, 3), 255, dtype=np.uint8)
+        label = baseline_slot(expected, slot, cv_img, SCALE_X, SCALE_Y)
+
+        got = np.full_like(expected, 255)
+        engine.render_slot(got, slot, cv_img, SCALE_X, SCALE_Y)
+        assert_matches_baseline(got, expected, label)
+
+def test_render_strip_label_edge():
+    cv_img = sample_image()
+    for slot in SLOTS:
+        expected = np.full((OUTPUT_SIZE[1], OUTPUT_SIZE[0], 3), 255, dtype=np.uint8)
+        label = baseline_slot(expected, slot, cv_img, SCALE_X, SCALE_Y)
+
+        # 라벨 첫 줄이 걸친 줄 묶음
+        strip_y = label[1] - 10
+        strip = np.empty((64, OUTPUT_SIZE[0], 3), dtype=np.uint8)
+        layout = {"preview_size": list(PREVIEW_SIZE), "slots": [slot]}
+        tiled.render_strip(strip, strip_y, layout, [cv_img], None, [], OUTPUT_SIZE)
+
+        got = expected.copy()
+        got[strip_y:strip_y + strip.shape[0]] = strip
+        assert_matches_baseline(got, expected, label)
@@ -0,0 +1,316 @@
+# _*_ coding: utf-8 _*_
+
+'''
+줄(strip) 단위 타일 출력
+
+A4/A3 포스터나 2400 DPI 처럼 전체 캔버스를 메모리에 올리기 어려운 출력을 위해
+슬롯, 프레임, 문구를 rows 줄씩 합성하여 PNG/TIFF 인코더로 바로 흘려보낸다.
+최대 메모리는 출력 크기가 아니라 한 줄 묶음(strip) 크기에 비례한다.
+
+슬롯과 프레임은 cv2.warpAffine 의 역매핑으로 해당 줄 범위만 리샘플링하므로
+전체 크기로 리사이즈한 중간 이미지를 만들지 않는다.
+
+    python tiled.py layout.json output.png [--rows 512]
+'''
+
+import sys
+import os
+import zlib
+import struct
+import argparse
+import cv2
+import numpy as np
+import engine
+
+DEFAULT_ROWS = 512
+
+class PngStreamWriter:
+    '''
+    줄 단위로 받은 RGB(또는 흑백) 데이터를 PNG 파일로 바로 압축해 쓰는 클래스
+    각 줄은 Up 필터로 저장한다.
+    '''
+    def __init__(self, path, width, height, dpi=None, channels=3, level=6):
+        self.path = path
+        self.f = open(path, 'wb')
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self.previous = np.zeros(width * channels, dtype=np.uint8)
+        self.compressor = zlib.compressobj(level)
+
+        color_type = 2 if channels == 3 else 0
+        self.f.write(b'\x89PNG\r\n\x1a\n')
+        self.write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+        if dpi:
+            # 인쇄 해상도 기록 (미터당 픽셀 수)
+            ppm = int(round(dpi / 0.0254))
+            self.write_chunk(b'pHYs', struct.pack('>IIB', ppm, ppm, 1))
+
+    def write_chunk(self, chunk_type, data):
+        self.f.write(struct.pack('>I', len(data)))
+        self.f.write(chunk_type)
+        self.f.write(data)
+        self.f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type)) & 0xffffffff))
+
+    def write_rows(self, rgb):
+        '''
+        (n, width, 3) uint8 RGB 또는 (n, width) 흑백 줄들을 추가하는 함수
+        '''
+        rows = rgb.reshape(rgb.shape[0], -1)
+        filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 2  # Up 필터
+        np.subtract(rows[0], self.previous, out=filtered[0, 1:])
+        np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+        self.previous = rows[-1].copy()
+        self.rows_written += rows.shape[0]
+
+        data = self.compressor.compress(filtered.tobytes())
+        if data:
+            self.write_chunk(b'IDAT', data)
+
+    def close(self):
+        if self.rows_written != self.height:
+            self.f.close()
+            raise ValueError("PNG 줄 수가 맞지 않습니다: {} / {}".format(self.rows_written, self.height))
+
+        self.write_chunk(b'IDAT', self.compressor.flush())
+        self.write_chunk(b'IEND', b'')
+        self.f.close()
+
+    def abort(self):
+        '''
+        렌더링이 중간에 실패했을 때 파일을 닫고 덜 쓴 출력 파일을 지우는 함수
+        '''
+        self.f.close()
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            print(e)
+
+class TiffStreamWriter:
+    '''
+    줄 단위로 받은 RGB(또는 흑백) 데이터를 무압축 TIFF 스트립으로 쓰는 클래스
+    IFD 는 모든 스트립을 쓴 뒤 파일 끝에 기록한다. (4GB 미만 출력만 지원)
+    '''
+    def __init__(self, path, width, height, dpi=None, channels=3):
+        self.path = path
+        self.f = open(path, 'wb')
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.dpi = dpi or 72
+        self.rows_per_strip = None
+        self.strips = []
+        self.rows_written = 0
+
+        # 리틀 엔디언 헤더, IFD 위치는 close 에서 채운다
+        self.f.write(b'II*\x00\x00\x00\x00\x00')
+
+    def write_rows(self, rgb):
+        '''
+        (n, width, 3) uint8 RGB 또는 (n, width) 흑백 줄들을 스트립 하나로 추가하는 함수
+        마지막을 제외한 모든 스트립은 같은 줄 수여야 한다.
+        '''
+        if self.rows_per_strip is None:
+            self.rows_per_strip = rgb.shape[0]
+        elif self.strips and self.strips[-1][2] != self.rows_per_strip:
+            raise ValueError("마지막 스트립 이후에는 줄을 추가할 수 없습니다.")
+
+        offset = self.f.tell()
+        data = np.ascontiguousarray(rgb).tobytes()
+        if offset + len(data) >= 2 ** 32:
+            raise ValueError("4GB 이상의 TIFF 는 지원하지 않습니다.")
+
+        self.f.write(data)
+        self.strips.append((offset, len(data), rgb.shape[0]))
+        self.rows_written += rgb.shape[0]
+
+    def close(self):
+        if self.rows_written != self.height:
+            self.f.close()
+            raise ValueError("TIFF 줄 수가 맞지 않습니다: {} / {}".format(self.rows_written, self.height))
+
+        def align():
+            if self.f.tell() % 2:
+                self.f.write(b'\x00')
+
+        # IFD 에서 참조하는 값 배열
+        align()
+        bits_offset = self.f.tell()
+        self.f.write(struct.pack('<3H', 8, 8, 8))
+        resolution_offset = self.f.tell()
+        self.f.write(struct.pack('<II', int(self.dpi), 1))
+        offsets_offset = self.f.tell()
+        self.f.write(struct.pack('<{}I'.format(len(self.strips)), *[strip[0] for strip in self.strips]))
+        counts_offset = self.f.tell()
+        self.f.write(struct.pack('<{}I'.format(len(self.strips)), *[strip[1] for strip in self.strips]))
+
+        def strip_entry(tag, offset, value):
+            # 값이 하나면 IFD 항목 안에 직접 기록
+            if len(self.strips) == 1:
+                return (tag, 4, 1, value)
+            return (tag, 4, len(self.strips), offset)
+
+        rgb = self.channels == 3
+        entries = [
+            (256, 4, 1, self.width),                # ImageWidth
+            (257, 4, 1, self.height),               # ImageLength
+            (258, 3, 3, bits_offset) if rgb else (258, 3, 1, 8),  # BitsPerSample
+            (259, 3, 1, 1),                         # Compression (없음)
+            (262, 3, 1, 2 if rgb else 1),           # PhotometricInterpretation (RGB / BlackIsZero)
+            strip_entry(273, offsets_offset, self.strips[0][0]),  # StripOffsets
+            (277, 3, 1, self.channels),             # SamplesPerPixel
+            (278, 4, 1, self.rows_per_strip),       # RowsPerStrip
+            strip_entry(279, counts_offset, self.strips[0][1]),   # StripByteCounts
+            (282, 5, 1, resolution_offset),         # XResolution
+            (283, 5, 1, resolution_offset),         # YResolution
+            (284, 3, 1, 1),                         # PlanarConfiguration
+            (296, 3, 1, 2),                         # ResolutionUnit (inch)
+        ]
+
+        align()
+        ifd_offset = self.f.tell()
+        self.f.write(struct.pack('<H', len(entries)))
+        for tag, field_type, count, value in entries:
+            if field_type == 3 and count == 1:
+                self.f.write(struct.pack('<HHIHH', tag, field_type, count, value, 0))
+            else:
+                self.f.write(struct.pack('<HHII', tag, field_type, count, value))
+        self.f.write(struct.pack('<I', 0))
+
+        self.f.seek(4)
+        self.f.write(struct.pack('<I', ifd_offset))
+        self.f.close()
+
+    def abort(self):
+        '''
+        렌더링이 중간에 실패했을 때 파일을 닫고 덜 쓴 출력 파일을 지우는 함수
+        '''
+        self.f.close()
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            print(e)
+
+def open_writer(path, width, height, dpi=None, channels=3):
+    '''
+    확장자에 맞는 스트림 인코더를 여는 함수
+    '''
+    file_type = os.path.splitext(path)[1].lower()
+    if file_type == ".png":
+        return PngStreamWriter(path, width, height, dpi, channels)
+    if file_type in (".tif", ".tiff"):
+        return TiffStreamWriter(path, width, height, dpi, channels)
+    raise ValueError("타일 출력은 PNG/TIFF 만 지원합니다: {}".format(path))
+
+def render_strip(strip, strip_y, layout, images, frame, text_tiles, output_size, orig_sizes=None):
+    '''
+    출력 이미지의 strip_y 줄부터 strip 높이만큼을 합성하는 함수
+    orig_sizes 는 images 가 원본보다 작게 디코딩된 경우의 원본 크기 목록이다.
+    '''
+    rows = strip.shape[0]
+    width_px, height_px = output_size
+    strip_bottom = strip_y + rows
+    strip.fill(255)  # 흰색 배경
+
+    # 화면 크기와 출력 크기의 비율 계산
+    preview_width, preview_height = layout["preview_size"]
+    scale_x = width_px / preview_width
+    scale_y = height_px / preview_height
+
+    # 슬롯 이미지 (이 줄 범위에 보이는 부분만)
+    for idx, (cv_img, slot) in enumerate(zip(images, layout.get("slots", []))):
+        if cv_img is None:
+            continue
+
+        image_size = (cv_img.shape[1], cv_img.shape[0])
+        orig_size = orig_sizes[idx] if orig_sizes is not None else slot.get("orig_size")
+        matrix = engine.slot_matrix(slot, image_size, scale_x, scale_y, orig_size)
+        x1, y1, x2, y2 = engine.slot_region(slot, image_size, matrix, scale_x, scale_y)
+        y1 = max(y1, strip_y)
+        y2 = min(y2, strip_bottom)
+        if y2 <= y1 or x2 <= x1:
+            continue
+
+        engine.warp_slot(cv_img, strip[y1 - strip_y:y2 - strip_y, x1:x2], matrix, (x1, y1, x2, y2))
+
+    # 프레임 (이 줄 범위만 리샘플링)
+    if frame is not None:
+        frame_strip = np.empty((rows, width_px, frame.shape[2]), dtype=np.uint8)
+        engine.warp_region(frame, frame_strip, width_px / frame.shape[1], height_px / frame.shape[0],
+                           0, 0, (0, strip_y, width_px, strip_bottom))
+        if frame.shape[2] == 4:  # 알파 채널이 있는 경우
+            engine.blend_frame(strip, frame_strip)
+        else:  # 알파 채널이 없는 경우 프레임으로 덮어쓰기
+            strip[:] = frame_strip
+
+    # 문구 (이 줄 범위로 옮긴 조각들)
+    shifted = [(tile, x, y - strip_y) for tile, x, y in text_tiles
+               if y < strip_bottom and y + tile.height > strip_y]
+    engine.composite_text_tiles(strip, shifted)
+
+def render_layout_tiled(layout, output_path, images=None, rows=DEFAULT_ROWS):
+    '''
+    레이아웃을 rows 줄씩 렌더링하여 output_path 에 PNG/TIFF 로 저장하는 함수
+    '''
+    layout = engine.resolve_profile(layout)
+    width_px, height_px = engine.output_size(layout)
+    preview_width, preview_height = layout["preview_size"]
+    scale_x = width_px / preview_width
+    scale_y = height_px / preview_height
+
+    # 슬롯 원본 이미지 (출력 크기로 리사이즈하지 않음)
+    # 크기 제한 모드이면 출력에 필요한 크기까지만 디코딩
+    slot_images = []
+    orig_sizes = []
+    for idx, slot in enumerate(layout.get("slots", [])):
+        cv_img = images[idx] if images is not None else None
+        orig_size = slot.get("orig_size")
+        if cv_img is None and slot.get("image_path"):
+            if engine.CAP_ORIGINALS:
+                cv_img, orig_size = engine.read_capped_image(
+                    slot["image_path"], engine.slot_sample_factor(slot, scale_x, scale_y))
+            else:
+                cv_img, orig_size = engine.read_image(slot["image_path"]), None
+        slot_images.append(cv_img)
+        orig_sizes.append(orig_size)
+
+    # 프레임 원본 (알파 채널 포함)
+    frame = None
+    frame_path = layout.get("frame_path") or ""
+    if os.path.exists(frame_path):
+        frame = engine.read_image(frame_path, cv2.IMREAD_UNCHANGED)
+
+    # 문구 조각은 작으므로 한 번만 만든다
+    if engine.is_horizontal(layout): # 가로 방향
+        text_tiles = engine.horizontal_text_tiles(layout, scale_x, scale_y)
+    else:
+        text_tiles = engine.vertical_text_tiles(layout, scale_x, scale_y)
+
+    gray = layout.get("color_format") == "gray"
+    writer = open_writer(output_path, width_px, height_px, layout.get("dpi", engine.DEFAULT_DPI),
+                         1 if gray else 3)
+    strip = np.empty((min(rows, height_px), width_px, 3), dtype=np.uint8)
+    try:
+        for strip_y in range(0, height_px, rows):
+            current = strip[:min(rows, height_px - strip_y)]
+            render_strip(current, strip_y, layout, slot_images, frame, text_tiles, (width_px, height_px), orig_sizes)
+            writer.write_rows(cv2.cvtColor(current, cv2.COLOR_BGR2GRAY if gray else cv2.COLOR_BGR2RGB))
+    except BaseException:
+        # 원래 예외를 그대로 전달하고, 줄 수 검사 오류로 덮지 않도록 close 대신 abort
+        writer.abort()
+        raise
+    writer.close()
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="레이아웃을 줄 단위로 렌더링하여 저장")
+    parser.add_argument("layout", help="레이아웃 JSON 경로")
+    parser.add_argument("output", help="출력 경로 (.png, .tif)")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="한 번에 합성할 줄 수")
+    args = parser.parse_args(argv[1:])
+
+    render_layout_tiled(engine.load_layout(args.layout), args.output, rows=args.rows)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,437 @@
+# _*_ coding: utf-8 _*_
+
+'''
+공유 폴더에 들어오는 사진 묶음을 자동으로 렌더링하는 감시(hot folder) 모드
+
+입력 폴더 아래의 하위 폴더 하나가 인화 한 장이다.
+
+    입력폴더/주문123/layout.json      레이아웃 매니페스트 (batch.py 한 줄과 같은 형식, 경로는 폴더 기준)
+    입력폴더/4_가로_김철수/*.jpg       이름 규약 (프레임 파일 이름과 같은 "4_가로", "9_vertical" 등)
+
+이름 규약을 쓰는 폴더는 템플릿 폴더의 "<규약>.json" 레이아웃 (예: 4_가로.json,
+4_horizontal.json)에 폴더의 사진을 이름 순서대로 채우고, 화면에서 사진을 처음
+불러올 때와 같이 라벨에 맞는 스케일로 배치한다.
+
+폴더 안의 파일이 settle 초 동안 바뀌지 않으면 다 복사된 것으로 보고 렌더링한다.
+렌더링 중인 작업이 queue_size 개이면 새 폴더는 자리가 날 때까지 기다린다.
+결과는 출력 폴더에 "<폴더 이름>.png" 로 저장하고 watch_status.jsonl 에 기록하므로
+다시 실행해도 바뀌지 않은 폴더는 다시 렌더링하지 않는다.
+
+Linux 에서는 inotify 로 변경을 기다리고, 그 밖의 환경이나 --poll 이면 주기적으로 검사한다.
+
+    python watcher.py 입력폴더 출력폴더 [--templates 템플릿폴더] [-j 작업 프로세스 수]
+'''
+
+import sys
+import os
+import json
+import math
+import hashlib
+import time
+import select
+import argparse
+import ctypes
+import ctypes.util
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import engine
+import profiles
+import batch
+
+STATUS_FILE = "watch_status.jsonl"
+STATS_FILE = "watch_stats.json"
+MANIFEST_NAME = "layout.json"
+LATENCY_WINDOW = 1000  # 백분위수를 계산할 최근 작업 수
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# set_frame 과 같은 프레임 이름 규약
+FRAME_NAMES = [
+    ("2_가로", "2_horizontal"), ("2_세로", "2_vertical"),
+    ("4_가로", "4_horizontal"), ("4_세로", "4_vertical"),
+    ("6_가로", "6_horizontal"), ("6_세로", "6_vertical"),
+    ("9_가로", "9_horizontal"), ("9_세로", "9_vertical"),
+]
+
+# inotify 이벤트 (sys/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+class PollWaiter:
+    '''
+    주기적으로 다시 검사하는 대기 방식
+    '''
+    def __init__(self, interval):
+        self.interval = interval
+
+    def add(self, path):
+        pass
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+
+    def close(self):
+        pass
+
+class InotifyWaiter:
+    '''
+    inotify 로 폴더가 바뀌거나 timeout 이 지날 때까지 기다리는 방식 (Linux)
+    '''
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 실패")
+        self.watched = set()
+
+    def add(self, path):
+        '''
+        폴더를 감시 목록에 추가하는 함수 (이미 추가한 폴더는 무시)
+        '''
+        if path in self.watched:
+            return
+        if self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK) < 0:
+            print(f"Error watching {path}: {os.strerror(ctypes.get_errno())}")
+            return
+        self.watched.add(path)
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return
+        # 어떤 파일이 바뀌었는지는 다시 검사하므로 이벤트 내용은 버린다
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+def open_waiter(interval, polling=False):
+    '''
+    가능하면 inotify, 아니면 주기 검사 대기 방식을 만드는 함수
+    '''
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWaiter()
+        except (OSError, AttributeError) as e:
+            print(f"inotify 를 사용할 수 없어 주기적으로 검사합니다: {e}")
+    return PollWaiter(interval)
+
+def frame_name_of(folder_name):
+    '''
+    폴더 이름에서 프레임 이름 규약 ("4_가로" 등) 목록을 찾는 함수 (없으면 None)
+    '''
+    for names in FRAME_NAMES:
+        if any(name in folder_name for name in names):
+            return names
+    return None
+
+def list_images(set_dir):
+    return sorted(name for name in os.listdir(set_dir)
+                  if name.lower().endswith(IMAGE_EXTENSIONS) and not name.startswith("."))
+
+def snapshot(set_dir):
+    '''
+    폴더 안 파일의 (이름, 크기, 수정 시각) 목록을 만드는 함수
+    복사 중인 파일이 있으면 다음 검사에서 값이 달라진다.
+    '''
+    entries = []
+    for entry in os.scandir(set_dir):
+        if entry.name.startswith(".") or not entry.is_file():
+            continue
+        stat = entry.stat()
+        entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(entries))
+
+def fit_scale(rect, image_path):
+    '''
+    사진을 라벨에 꽉 차게 맞추는 스케일을 계산하는 함수 (Program.image_loaded 와 같은 계산)
+    '''
+    img_width, img_height = engine.image_size(image_path)
+    scale = math.ceil(min(rect[2] / img_width * 100, rect[3] / img_height * 100))
+    return min(scale, 100), (img_width, img_height)
+
+def load_template(templates_dir, names):
+    for name in names:
+        path = os.path.join(templates_dir, name + ".json")
+        if os.path.exists(path):
+            return engine.load_layout(path), path
+    raise ValueError("템플릿이 없습니다: {}".format(" / ".join(name + ".json" for name in names)))
+
+def build_set_layout(set_dir, templates_dir, profile=None):
+    '''
+    폴더 하나를 렌더링할 레이아웃으로 만드는 함수
+    layout.json 이 있으면 그대로 쓰고, 없으면 이름 규약의 템플릿에 사진을 채운다.
+    '''
+    manifest_path = os.path.join(set_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        layout = engine.load_layout(manifest_path)
+        base_dir = set_dir
+    else:
+        names = frame_name_of(os.path.basename(set_dir))
+        if names is None or not templates_dir:
+            raise ValueError("layout.json 이 없고 폴더 이름이 규약에 맞지 않습니다.")
+        layout, template_path = load_template(templates_dir, names)
+        base_dir = os.path.dirname(os.path.abspath(template_path))
+
+        images = list_images(set_dir)
+        for slot in layout.get("slots", []):
+            slot["image_path"] = None
+        for slot, name in zip(layout.get("slots", []), images):
+            image_path = os.path.join(set_dir, name)
+            scale, orig_size = fit_scale(slot["rect"], image_path)
+            slot.update({"image_path": image_path, "scale": str(scale), "moved": None, "orig_size": list(orig_size)})
+
+    layout["frame_path"] = batch.resolve_path(base_dir, layout.get("frame_path"))
+    layout["font_path"] = batch.resolve_path(base_dir, layout.get("font_path"))
+    for slot in layout.get("slots", []):
+        slot["image_path"] = batch.resolve_path(set_dir, slot.get("image_path"))
+    if profile:
+        layout = profiles.apply_profile(layout, profile)
+    return layout
+
+def percentile(values, percent):
+    '''
+    정렬하지 않은 값 목록의 백분위수 (가장 가까운 순위, 초 단위 소수 셋째 자리)를 계산하는 함수
+    '''
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return round(ordered[rank - 1], 3)
+
+class WatchStats:
+    '''
+    처리량과 지연 시간 통계
+    latency 는 폴더가 준비된 뒤 결과가 나올 때까지, wait 는 그중 자리가 나길 기다린 시간이며
+    최근 LATENCY_WINDOW 건으로 백분위수를 계산한다.
+    '''
+    def __init__(self):
+        self.started = time.time()
+        self.done = 0
+        self.failed = 0
+        self.waiting = 0  # 준비되었지만 렌더링할 자리가 없어 기다리는 폴더 수
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.waits = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, record, ready_at, submitted_at):
+        now = time.time()
+        if record["ok"]:
+            self.done += 1
+        else:
+            self.failed += 1
+        self.latencies.append(now - ready_at)
+        self.waits.append(submitted_at - ready_at)
+
+    def summary(self, queued):
+        elapsed = max(time.time() - self.started, 1e-9)
+        return {
+            "uptime": round(elapsed, 1),
+            "done": self.done,
+            "failed": self.failed,
+            "queued": queued,
+            "waiting": self.waiting,
+            "per_minute": round((self.done + self.failed) * 60 / elapsed, 2),
+            "latency_p50": percentile(self.latencies, 50),
+            "latency_p95": percentile(self.latencies, 95),
+            "wait_p95": percentile(self.waits, 95)
+        }
+
+    def format(self, queued):
+        result = self.summary(queued)
+        if result["latency_p50"] is None:
+            return "완료 0건, 렌더링 중 {}건".format(queued)
+        return "완료 {}건, 실패 {}건, 렌더링 중 {}건, 대기 {}건, 분당 {}건, 지연 p50 {:.1f}s / p95 {:.1f}s".format(
+            result["done"], result["failed"], queued, result["waiting"], result["per_minute"],
+            result["latency_p50"], result["latency_p95"])
+
+def read_done(output_dir):
+    '''
+    이전 실행에서 성공한 폴더 이름과 파일 목록 서명을 읽는 함수
+    '''
+    done = {}
+    status_path = os.path.join(output_dir, STATUS_FILE)
+    if not os.path.exists(status_path):
+        return done
+    with open(status_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("ok") and os.path.exists(record.get("output", "")):
+                done[record["id"]] = record.get("signature")
+    return done
+
+def signature_of(files):
+    '''
+    파일 목록 서명 (다시 실행해도 같은 값)
+    '''
+    return hashlib.sha1(json.dumps(files).encode('utf-8')).hexdigest()
+
+def watch(input_dir, output_dir, templates_dir=None, workers=None, queue_size=None, settle=5.0,
+          polling=False, poll_interval=2.0, stats_interval=60.0, profile=None, log=print, should_stop=None):
+    '''
+    입력 폴더를 감시하며 준비된 폴더를 렌더링하는 함수
+    should_stop() 이 참을 반환하거나 Ctrl+C 를 누르면 렌더링 중인 작업을 마치고 통계를 반환한다.
+    '''
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    queue_size = queue_size or workers * 2
+    done = read_done(output_dir)
+    stats = WatchStats()
+    seen = {}  # 폴더 이름: {"files", "changed"}
+    running = {}  # future: (폴더 이름, 서명, 준비 시각, 제출 시각)
+    waiter = open_waiter(poll_interval, polling)
+    waiter.add(input_dir)
+    status_path = os.path.join(output_dir, STATUS_FILE)
+    next_stats = time.time() + stats_interval
+    log("감시 시작: {} -> {} ({})".format(input_dir, output_dir, type(waiter).__name__))
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=batch.init_worker)
+    pool_broken = False
+    try:
+        with open(status_path, 'a', encoding='utf-8') as status:
+            while should_stop is None or not should_stop():
+                now = time.time()
+
+                # 끝난 작업 기록
+                for future in [future for future in running if future.done()]:
+                    name, signature, ready_at, submitted_at = running.pop(future)
+                    try:
+                        record = future.result()
+                    except BrokenProcessPool as e:
+                        # 작업 프로세스가 비정상 종료되면 풀의 모든 작업이 실패하므로 풀을 다시 만든다
+                        pool_broken = True
+                        record = {"id": name, "output": os.path.join(output_dir, name + ".png"), "ok": False,
+                                  "error": "{}: {}".format(type(e).__name__, e),
+                                  "seconds": round(time.time() - submitted_at, 3)}
+                    record["signature"] = signature
+                    stats.record(record, ready_at, submitted_at)
+                    status.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    status.flush()
+                    # 실패한 폴더도 파일이 바뀔 때까지 (또는 다시 실행할 때까지) 다시 시도하지 않는다
+                    done[name] = signature
+                    if record["ok"]:
+                        log("[OK] {} ({}s) -> {}".format(name, record["seconds"], record["output"]))
+                    else:
+                        log("[FAIL] {} {}".format(name, record["error"]))
+                if pool_broken and not running:
+                    executor.shutdown(wait=False)
+                    executor = ProcessPoolExecutor(max_workers=workers, initializer=batch.init_worker)
+                    pool_broken = False
+                    log("작업 프로세스가 비정상 종료되어 다시 시작합니다.")
+
+                # 폴더 검사: 파일 목록이 settle 초 동안 그대로이면 준비된 것으로 본다
+                ready = []
+                names = set()
+                for entry in sorted(os.scandir(input_dir), key=lambda entry: entry.name):
+                    if entry.name.startswith(".") or not entry.is_dir():
+                        continue
+                    names.add(entry.name)
+                    waiter.add(entry.path)
+                    try:
+                        files = snapshot(entry.path)
+                    except OSError:
+                        continue  # 검사 중에 지워진 폴더
+                    state = seen.get(entry.name)
+                    if state is None or state["files"] != files:
+                        seen[entry.name] = state = {"files": files, "changed": now}
+                    signature = signature_of(files)
+                    if not files or done.get(entry.name) == signature:
+                        continue
+                    if any(running_name == entry.name for running_name, *_ in running.values()):
+                        continue
+                    if now - state["changed"] >= settle:
+                        ready.append((entry.name, entry.path, signature, state["changed"] + settle))
+                for name in set(seen) - names:
+                    del seen[name]
+
+                # 자리가 있는 만큼만 제출하고 나머지는 다음 검사로 미룬다
+                stats.waiting = 0
+                for name, path, signature, ready_at in ready:
+                    if len(running) >= queue_size:
+                        stats.waiting += 1
+                        continue
+                    output = os.path.join(output_dir, name + ".png")
+                    try:
+                        layout = build_set_layout(path, templates_dir, profile)
+                    except (OSError, ValueError) as e:
+                        # 준비되지 않은 매니페스트는 파일이 바뀌면 다시 시도
+                        done[name] = signature
+                        record = {"id": name, "output": output, "ok": False, "signature": signature,
+                                  "error": "{}: {}".format(type(e).__name__, e), "seconds": 0}
+                        status.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        status.flush()
+                        stats.failed += 1
+                        log("[FAIL] {} {}".format(name, record["error"]))
+                        continue
+                    try:
+                        future = executor.submit(batch.run_job, name, output, layout)
+                    except BrokenProcessPool:
+                        pool_broken = True
+                        break  # 남은 작업이 모두 끝나면 풀을 다시 만들고 다음 검사에서 제출
+                    running[future] = (name, signature, ready_at, time.time())
+
+                if now >= next_stats:
+                    next_stats = now + stats_interval
+                    log(stats.format(len(running)))
+                    write_stats(output_dir, stats.summary(len(running)))
+
+                # 다음 검사까지 대기 (준비 대기 중인 폴더나 렌더링 중인 작업이 있으면 짧게)
+                timeout = stats_interval
+                pending = [state["changed"] + settle - now for state in seen.values() if now - state["changed"] < settle]
+                if pending:
+                    timeout = min(timeout, max(0.1, min(pending)))
+                if running:
+                    timeout = min(timeout, 0.5)
+                waiter.wait(timeout)
+    except KeyboardInterrupt:
+        log("감시를 종료합니다. 렌더링 중인 {}건을 마칩니다.".format(len(running)))
+    finally:
+        executor.shutdown(wait=True)
+        waiter.close()
+
+    write_stats(output_dir, stats.summary(0))
+    return stats
+
+def write_stats(output_dir, summary):
+    '''
+    통계를 출력 폴더의 watch_stats.json 에 쓰는 함수
+    '''
+    path = os.path.join(output_dir, STATS_FILE)
+    with open(path + ".part", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".part", path)
+
+def main(argv):
+    # profiles.json 의 프로파일도 --profile 로 고를 수 있도록 인자를 만들기 전에 읽는다
+    profiles.load_profiles()
+
+    parser = argparse.ArgumentParser(description="폴더를 감시하며 들어온 사진 묶음을 자동으로 렌더링")
+    parser.add_argument("input_dir", help="감시할 입력 폴더")
+    parser.add_argument("output_dir", help="출력 폴더")
+    parser.add_argument("--templates", default=None, help="이름 규약 폴더에 사용할 템플릿 레이아웃 폴더")
+    parser.add_argument("--profile", default=None, choices=sorted(profiles.PROFILES), help="출력 프로파일 (기본: 레이아웃 값)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="작업 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--queue", type=int, default=None, help="동시에 렌더링 대기할 최대 작업 수 (기본: 작업 프로세스 수 x 2)")
+    parser.add_argument("--settle", type=float, default=5.0, help="파일이 이 시간(초) 동안 바뀌지 않으면 렌더링")
+    parser.add_argument("--poll", action="store_true", help="inotify 대신 주기적으로 검사")
+    parser.add_argument("--interval", type=float, default=2.0, help="주기 검사 간격 (초)")
+    parser.add_argument("--stats-interval", type=float, default=60.0, help="통계 출력 간격 (초)")
+    args = parser.parse_args(argv[1:])
+
+    watch(args.input_dir, args.output_dir, args.templates, args.jobs, args.queue, args.settle,
+          args.poll, args.interval, args.stats_interval, args.profile)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))